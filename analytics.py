@@ -0,0 +1,315 @@
+"""Columnar export of the game history and vectorized aggregations over it.
+
+An export is a directory of column parts plus a manifest recording how far
+into the source (a byte offset in the JSON-Lines log, or the last SQLite row
+id) it has read, so each run only converts the games added since the last
+one. The manifest also identifies the source at that point (a hash of the
+log bytes just before the offset, or the database's clear generation), so a
+cleared or rewritten source is exported again from scratch instead of being
+resumed mid-way. Parts are Parquet files when pyarrow is installed and compressed NumPy
+.npz files otherwise; the aggregations load every part into NumPy arrays and
+never loop over games in Python.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+from history import date_to_epoch, INT64_MAX, INT64_MIN
+from scores import format_range, parse_range_key
+from storage import HistoryLog, write_json_atomic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+COLUMNS = ('timestamp', 'min_range', 'max_range', 'max_attempts', 'attempts_used', 'won', 'secret_number')
+
+MANIFEST = "manifest.json"
+EXPORT_FORMAT_VERSION = 2
+
+# Rows per part file written in one export run
+PART_ROWS = 1 << 20
+
+# Log bytes hashed to recognise the point an export stopped at
+TAIL_BYTES = 4096
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def row_for(record):
+    """Column values of one record, or None if it can't be represented"""
+    try:
+        low, high = parse_range_key(record['range'])
+        row = (date_to_epoch(record['date']), low, high, int(record['max_attempts']),
+               int(record['attempts_used']), 1 if record['won'] else 0, int(record['secret_number']))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(INT64_MIN <= value <= INT64_MAX for value in row):
+        return None
+    return row
+
+
+def columns_for(rows):
+    """Dict of NumPy arrays from a list of row tuples"""
+    if rows:
+        table = np.array(rows, dtype=np.int64)
+    else:
+        table = np.empty((0, len(COLUMNS)), dtype=np.int64)
+    columns = {name: np.ascontiguousarray(table[:, i]) for i, name in enumerate(COLUMNS)}
+    columns['won'] = columns['won'].astype(np.bool_)
+    return columns
+
+
+def log_tail_id(path, offset):
+    """Hash of the log bytes just before `offset`; differs once the log is cleared or rewritten"""
+    tail = b""
+    if offset:
+        start = max(0, offset - TAIL_BYTES)
+        with open(path, "rb") as f:
+            f.seek(start)
+            tail = f.read(offset - start)
+    return hashlib.blake2b(tail, digest_size=16).hexdigest()
+
+
+class ColumnarExport:
+    """A directory of column parts that grows with each incremental export"""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = None
+
+    def load_manifest(self):
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        return self.manifest
+
+    def start(self, fmt, source, source_kind):
+        """Begin a fresh export, dropping any previous parts"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self.manifest = {'version': EXPORT_FORMAT_VERSION, 'format': fmt, 'source': source,
+                         'source_kind': source_kind, 'offset': 0, 'rows': 0, 'skipped': 0, 'parts': []}
+
+    def export(self, source, source_kind='jsonl', fmt='auto', full=False):
+        """Append every game added to the source since the last export; returns rows added"""
+        if fmt == 'auto':
+            fmt = 'parquet' if pq is not None else 'npz'
+        if fmt == 'parquet' and pq is None:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow); use --format npz")
+
+        manifest = None if full else self.load_manifest()
+        if manifest is not None and (manifest['source'], manifest['source_kind']) != (source, source_kind):
+            raise ValueError(f"{self.path} was exported from {manifest['source']}; use --full to replace it")
+
+        if source_kind == 'sqlite':
+            from backends import SqliteBackend
+            backend = SqliteBackend(source).connect()
+            end = backend.last_id()
+            read = backend.iter_after
+
+            def source_id(offset):
+                # Row ids restart after a clear, which bumps the generation
+                return backend.get_meta('generation') or '0'
+        else:
+            backend = None
+            history_log = HistoryLog(source)
+            end = history_log.size()
+            read = history_log.iter_complete
+
+            def source_id(offset):
+                return log_tail_id(source, offset)
+
+        # A cleared or rewritten source can't be continued from the old offset
+        if (manifest is None or manifest['offset'] > end
+                or manifest.get('source_id') != source_id(manifest['offset'])):
+            self.start(fmt if manifest is None else manifest['format'], source, source_kind)
+        manifest = self.manifest
+
+        added = 0
+        rows = []
+        last_offset = manifest['offset']
+        try:
+            for record, offset in read(manifest['offset']):
+                row = row_for(record)
+                if row is None:
+                    manifest['skipped'] += 1
+                else:
+                    rows.append(row)
+                last_offset = offset
+                if len(rows) >= PART_ROWS:
+                    added += self.write_part(rows, last_offset, source_id(last_offset))
+                    rows = []
+            if rows or last_offset != manifest['offset'] or 'source_id' not in manifest:
+                added += self.write_part(rows, last_offset, source_id(last_offset))
+        finally:
+            if backend is not None:
+                backend.close()
+        return added
+
+    def write_part(self, rows, offset, source_id):
+        """Write rows as the next part, then commit the manifest that covers them"""
+        manifest = self.manifest
+        if rows:
+            name = f"part-{len(manifest['parts']):05d}.{manifest['format']}"
+            columns = columns_for(rows)
+            tmp_path = os.path.join(self.path, name + ".tmp")
+            if manifest['format'] == 'parquet':
+                pq.write_table(pa.table(columns), tmp_path)
+            else:
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(f, **columns)
+            os.replace(tmp_path, os.path.join(self.path, name))
+            manifest['parts'].append({'file': name, 'rows': len(rows)})
+            manifest['rows'] += len(rows)
+        manifest['offset'] = offset
+        manifest['source_id'] = source_id
+        write_json_atomic(os.path.join(self.path, MANIFEST), manifest, indent=2)
+        return len(rows)
+
+    def read_columns(self):
+        """Every exported game as a dict of NumPy arrays, in history order"""
+        if self.load_manifest() is None:
+            raise FileNotFoundError(f"No export found in {self.path}")
+        parts = []
+        for part in self.manifest['parts']:
+            part_path = os.path.join(self.path, part['file'])
+            if part['file'].endswith('.parquet'):
+                table = pq.read_table(part_path)
+                parts.append({name: table.column(name).to_numpy() for name in COLUMNS})
+            else:
+                with np.load(part_path) as data:
+                    parts.append({name: data[name] for name in COLUMNS})
+        if not parts:
+            return columns_for([])
+        return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+
+def win_rate_by_range(columns):
+    """[(min, max, games, wins, win rate %)] for every range, sorted by range"""
+    if not len(columns['won']):
+        return []
+    pairs = np.stack([columns['min_range'], columns['max_range']], axis=1)
+    ranges, group = np.unique(pairs, axis=0, return_inverse=True)
+    group = group.ravel()
+    games = np.bincount(group, minlength=len(ranges))
+    wins = np.bincount(group, weights=columns['won'], minlength=len(ranges)).astype(np.int64)
+    return [(int(low), int(high), int(n), int(w), w / n * 100)
+            for (low, high), n, w in zip(ranges, games, wins)]
+
+
+def attempts_histogram(columns):
+    """Attempts used -> (games won, games lost)"""
+    attempts = columns['attempts_used']
+    won = columns['won']
+    size = int(attempts.max()) + 1 if len(attempts) else 1
+    wins = np.bincount(attempts[won], minlength=size)
+    losses = np.bincount(attempts[~won], minlength=size)
+    return {n: (int(wins[n]), int(losses[n])) for n in range(size) if wins[n] or losses[n]}
+
+
+def streak_distribution(columns):
+    """Win streak length -> how many times a streak of exactly that length happened"""
+    won = columns['won'].astype(np.int8)
+    edges = np.diff(np.concatenate(([0], won, [0])))
+    lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    counts = np.bincount(lengths) if len(lengths) else np.zeros(1, dtype=np.int64)
+    return {n: int(count) for n, count in enumerate(counts) if count}
+
+
+def time_of_day(columns):
+    """Games and win rate per hour of day and per weekday"""
+    timestamps = columns['timestamp']
+    won = columns['won']
+    hours = (timestamps // 3600) % 24
+    # The epoch (1970-01-01) was a Thursday
+    weekdays = (timestamps // 86400 + 3) % 7
+
+    def breakdown(keys, size, labels):
+        games = np.bincount(keys, minlength=size)
+        wins = np.bincount(keys[won], minlength=size)
+        return [(labels[i], int(games[i]), wins[i] / games[i] * 100 if games[i] else 0.0)
+                for i in range(size)]
+    return {'hour': breakdown(hours, 24, [f"{hour:02d}:00" for hour in range(24)]),
+            'weekday': breakdown(weekdays, 7, WEEKDAYS)}
+
+
+def analyze(columns):
+    """Every aggregation as plain Python data"""
+    total = len(columns['won'])
+    wins = int(np.count_nonzero(columns['won']))
+    return {
+        'games': total,
+        'wins': wins,
+        'win_rate': wins / total * 100 if total else 0.0,
+        'by_range': win_rate_by_range(columns),
+        'attempts': attempts_histogram(columns),
+        'streaks': streak_distribution(columns),
+        'time_of_day': time_of_day(columns),
+    }
+
+
+def print_report(report, top_ranges=20):
+    print(f"Games: {report['games']:,}  Wins: {report['wins']:,}  Win rate: {report['win_rate']:.1f}%")
+
+    by_range = sorted(report['by_range'], key=lambda row: row[2], reverse=True)
+    print(f"\nWin rate by range (top {min(top_ranges, len(by_range))} of {len(by_range)} by games played)")
+    for low, high, games, wins, rate in by_range[:top_ranges]:
+        print(f"  {format_range((low, high)):>15} {games:>10,} games {rate:>6.1f}%")
+
+    print("\nAttempts used      won       lost")
+    for attempts, (won, lost) in report['attempts'].items():
+        print(f"  {attempts:>11} {won:>10,} {lost:>10,}")
+
+    streaks = report['streaks']
+    if streaks:
+        print(f"\nWin streaks: {sum(streaks.values()):,}, longest {max(streaks)}")
+        print("  " + "  ".join(f"{length}:{count}" for length, count in streaks.items()))
+
+    for name in ('hour', 'weekday'):
+        print(f"\nBy {name}")
+        for label, games, rate in report['time_of_day'][name]:
+            if games:
+                print(f"  {label:>5} {games:>10,} games {rate:>6.1f}%")
+
+
+def run_export(source, out, source_kind='jsonl', fmt='auto', full=False):
+    if np is None:
+        print("Exporting needs NumPy (pip install numpy)")
+        return None
+    export = ColumnarExport(out)
+    try:
+        added = export.export(source, source_kind, fmt, full)
+    except (OSError, ValueError) as e:
+        print(f"Error exporting history: {e}")
+        return None
+    manifest = export.manifest
+    print(f"Exported {added:,} new games to {out} ({manifest['format']}, "
+          f"{manifest['rows']:,} total in {len(manifest['parts'])} parts, {manifest['skipped']} skipped)")
+    return export
+
+
+def run_analysis(path, json_path=None):
+    if np is None:
+        print("Analysis needs NumPy (pip install numpy)")
+        return None
+    try:
+        columns = ColumnarExport(path).read_columns()
+    except (OSError, ValueError) as e:
+        print(f"Error reading export: {e}")
+        return None
+    report = analyze(columns)
+    print_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
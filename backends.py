@@ -0,0 +1,550 @@
+"""Persistence backends behind GameEngine.
+
+JsonBackend keeps the original files (JSON-Lines history, best_scores.json and
+the stats snapshot). SqliteBackend stores games and best scores in one SQLite
+database in WAL mode, so statistics are answered by indexed queries and
+memory stays flat however long the history gets.
+
+Both update their in-memory state immediately and leave every write to a
+WriteBehindWorker thread, so recording a game never blocks the caller on
+disk I/O. close() drains the worker.
+"""
+import json
+import os
+import sqlite3
+from collections import deque
+
+from history import INT64_MAX, INT64_MIN
+from scores import BestScoreIndex, parse_range_key
+from stats import StatsAggregator
+from storage import HistoryLog, WriteBehindWorker, write_json_atomic
+
+CONFIG_PATH = "game_config.json"
+
+DEFAULT_CONFIG = {
+    'backend': 'json',
+    'database': 'games.db',
+    'sync_every': 20,
+    'stats_save_interval': 0.0,
+    'write_delay': 0.25,
+    # A difficulty.PROFILES name or a dict of DifficultyProfile arguments
+    'hint_profile': 'proportional',
+}
+
+
+def load_config(path=CONFIG_PATH):
+    """Settings from game_config.json layered over DEFAULT_CONFIG"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+    except Exception as e:
+        print(f"Error loading config: {e}")
+    return config
+
+
+def open_backend(config=None, directory=None, **overrides):
+    """Create the backend named by config['backend'] ('json' or 'sqlite').
+
+    With a directory, every file the backend uses lives there instead of the
+    current directory (one directory per player profile).
+    """
+    config = dict(config or load_config(), **overrides)
+    if config['backend'] == 'sqlite':
+        database = config['database']
+        if directory is not None:
+            database = os.path.join(directory, os.path.basename(database))
+        return SqliteBackend(database, write_delay=config['write_delay'])
+    if config['backend'] == 'json':
+        paths = {}
+        if directory is not None:
+            paths = {'history_path': os.path.join(directory, "game_history.jsonl"),
+                     'legacy_history_path': os.path.join(directory, "game_history.json"),
+                     'best_scores_path': os.path.join(directory, "best_scores.json"),
+                     'best_times_path': os.path.join(directory, "best_times.json"),
+                     'stats_path': os.path.join(directory, "game_stats.json")}
+        return JsonBackend(sync_every=config['sync_every'],
+                           stats_save_interval=config['stats_save_interval'],
+                           write_delay=config['write_delay'], **paths)
+    raise ValueError(f"Unknown backend: {config['backend']!r}")
+
+
+def fits_int64(value):
+    return INT64_MIN <= value <= INT64_MAX
+
+
+class JsonBackend:
+    """History in an append-only JSON-Lines log, best scores in best_scores.json.
+
+    Only the most recent games are kept in memory; the stats come from the
+    snapshot plus the log tail written after it.
+    """
+
+    RECENT_CACHE = 100
+
+    def __init__(self, history_path="game_history.jsonl", legacy_history_path="game_history.json",
+                 best_scores_path="best_scores.json", stats_path="game_stats.json",
+                 best_times_path="best_times.json", sync_every=20, stats_save_interval=0.0,
+                 write_delay=0.25):
+        self.best_scores_path = best_scores_path
+        self.best_times_path = best_times_path
+        self.history_log = HistoryLog(history_path, legacy_history_path, sync_every=sync_every)
+        self.stats = StatsAggregator(stats_path, save_interval=stats_save_interval)
+        self.best_scores = BestScoreIndex()
+        self.best_times = BestScoreIndex()
+        self.recent_games = deque(maxlen=self.RECENT_CACHE)
+        self.on_error = None
+        self.writer = WriteBehindWorker(write_delay, on_error=self.report_write_error)
+
+    def load(self):
+        self.best_scores = self.load_best_scores()
+        self.best_times = self.load_best_scores(self.best_times_path)
+        self.load_game_history()
+        return self
+
+    def load_best_scores(self, path=None):
+        """Load best scores from JSON file"""
+        try:
+            return BestScoreIndex.load(path or self.best_scores_path)
+        except Exception as e:
+            print(f"Error loading best scores: {e}")
+        return BestScoreIndex()
+
+    def load_game_history(self):
+        """Catch the stats up with the log (migrating old JSON once) and read the recent games"""
+        self.recent_games.clear()
+        try:
+            self.history_log.repair()
+            self.stats.load(self.history_log)
+            if self.stats.damaged >= self.history_log.compact_threshold:
+                # Too many damaged lines to keep skipping over: drop them and recount
+                self.history_log.repair(force=True)
+                self.stats.load(self.history_log)
+            self.recent_games.extend(self.history_log.tail(self.RECENT_CACHE))
+        except Exception as e:
+            print(f"Error loading game history: {e}")
+
+    def append(self, game_record):
+        """Append a single game - O(1) regardless of history size"""
+        self.recent_games.append(game_record)
+        self.stats.add(game_record)
+
+        # The log line and the stats snapshot covering it are queued together,
+        # so a written snapshot never claims games the log doesn't have yet
+        snapshot = self.stats.to_dict()
+        self.writer.submit(ordered=lambda: self.history_log.append(game_record),
+                           key='stats', job=lambda: self.write_stats(snapshot))
+
+    def extend(self, records):
+        """Append a batch of games as one log write (bulk imports, tournaments)"""
+        records = list(records)
+        self.recent_games.extend(records)
+        for record in records:
+            self.stats.add(record)
+        snapshot = self.stats.to_dict()
+        self.writer.submit(ordered=lambda: self.history_log.append_many(records),
+                           key='stats', job=lambda: self.write_stats(snapshot))
+
+    def write_stats(self, snapshot, force=False):
+        """Worker side: save a stats snapshot stamped with the current log size"""
+        snapshot['log_offset'] = self.history_log.size()
+        self.stats.save_snapshot(snapshot, force)
+
+    def recent(self, count):
+        """The last `count` games, oldest first"""
+        if count <= len(self.recent_games) or len(self.recent_games) < self.RECENT_CACHE:
+            return list(self.recent_games)[-count:]
+        self.writer.flush()
+        return self.history_log.tail(count)
+
+    def record_best(self, min_range, max_range, max_attempts, attempts):
+        """Record a win; queues a save and returns True when it is a new best"""
+        if not self.best_scores.record(min_range, max_range, max_attempts, attempts):
+            return False
+        self.queue_best_scores()
+        return True
+
+    def record_best_time(self, min_range, max_range, max_attempts, duration_ms):
+        """Record a timed win; queues a save and returns True when it is the fastest"""
+        if not self.best_times.record(min_range, max_range, max_attempts, duration_ms):
+            return False
+        self.queue_best_scores(self.best_times, self.best_times_path)
+        return True
+
+    def record_bests(self, bests):
+        """Record a batch of wins ({(min, max, max_attempts): attempts}) with one save; returns the new bests"""
+        improved = {key: attempts for key, attempts in bests.items() if self.best_scores.record(*key, attempts)}
+        if improved:
+            self.queue_best_scores()
+        return improved
+
+    def queue_best_scores(self, index=None, path=None):
+        index = self.best_scores if index is None else index
+        path = path or self.best_scores_path
+        # Serialized on the worker, so a new best costs the caller one queue entry however big the index is
+        self.writer.submit(key=path, job=lambda: write_json_atomic(path, index.to_json(), separators=(",", ":")))
+
+    def clear(self):
+        self.best_scores = BestScoreIndex()
+        self.best_times = BestScoreIndex()
+        self.recent_games.clear()
+        self.stats.reset()
+        snapshot = self.stats.to_dict()
+        self.writer.submit(ordered=self.history_log.clear,
+                           key='stats', job=lambda: self.write_stats(snapshot, force=True))
+        self.queue_best_scores()
+        self.queue_best_scores(self.best_times, self.best_times_path)
+
+    def report_write_error(self, error):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"Error saving data: {error}")
+
+    def close(self):
+        snapshot = self.stats.to_dict()
+        self.writer.submit(key='stats', job=lambda: self.write_stats(snapshot, force=True))
+        self.writer.close()
+        self.history_log.close()
+
+
+class SqliteBackend:
+    """Games and best scores in SQLite with WAL and batched commits.
+
+    Inserts run on the write-behind worker and everything queued during one
+    debounce window is committed as a single transaction, together with the
+    stats snapshot that covers it. Statistics are rebuilt with indexed
+    aggregate queries only when that snapshot is missing or out of step with
+    the games table. The most recent games are mirrored in memory so the
+    caller's thread never has to query the database after load().
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            min_range INTEGER NOT NULL,
+            max_range INTEGER NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            attempts_used INTEGER NOT NULL,
+            won INTEGER NOT NULL,
+            secret_number INTEGER NOT NULL,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_games_date ON games(date);
+        CREATE INDEX IF NOT EXISTS idx_games_range ON games(min_range, max_range);
+        CREATE INDEX IF NOT EXISTS idx_games_won ON games(won);
+        CREATE TABLE IF NOT EXISTS best_scores (
+            min_range INTEGER NOT NULL,
+            max_range INTEGER NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            best INTEGER NOT NULL,
+            PRIMARY KEY (min_range, max_range, max_attempts)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS best_times (
+            min_range INTEGER NOT NULL,
+            max_range INTEGER NOT NULL,
+            max_attempts INTEGER NOT NULL,
+            best INTEGER NOT NULL,
+            PRIMARY KEY (min_range, max_range, max_attempts)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS wide_bests (
+            kind TEXT NOT NULL,
+            min_range TEXT NOT NULL,
+            max_range TEXT NOT NULL,
+            max_attempts TEXT NOT NULL,
+            best INTEGER NOT NULL,
+            PRIMARY KEY (kind, min_range, max_range, max_attempts)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    COLUMNS = ('date', 'min_range', 'max_range', 'max_attempts',
+               'attempts_used', 'won', 'secret_number')
+
+    RECENT_CACHE = 100
+
+    # SQLite integers are 64-bit (bigger ones silently become REALs), so games
+    # with larger numbers keep them in the extra JSON and store 0 in the
+    # column, and their best scores go to wide_bests with decimal-text keys.
+    WIDE_FIELDS = ('max_attempts', 'attempts_used', 'secret_number')
+
+    def __init__(self, path="games.db", write_delay=0.25):
+        self.path = path
+        self.conn = None
+        self.stats = StatsAggregator(None)
+        self.best_scores = BestScoreIndex()
+        self.best_times = BestScoreIndex()
+        self.recent_games = deque(maxlen=self.RECENT_CACHE)
+        self.on_error = None
+        self.writer = WriteBehindWorker(write_delay, on_error=self.report_write_error)
+
+    def connect(self):
+        """Open the database without loading anything (enough for iter_after)"""
+        # Opened on the GUI's loader thread, then only used by the write-behind worker
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        return self
+
+    def load(self):
+        self.connect()
+        if self.get_meta('imported_json') is None:
+            self.import_json_files()
+
+        self.best_scores = self.load_index('best_scores')
+        self.best_times = self.load_index('best_times')
+        self.load_stats()
+        self.recent_games.clear()
+        self.recent_games.extend(self.query_recent(self.RECENT_CACHE))
+        return self
+
+    def load_index(self, table):
+        index = BestScoreIndex()
+        for row in self.conn.execute(f"SELECT min_range, max_range, max_attempts, best FROM {table}"):
+            index.record(*row)
+        for low, high, max_attempts, best in self.conn.execute(
+                "SELECT min_range, max_range, max_attempts, best FROM wide_bests WHERE kind = ?", (table,)):
+            index.record(int(low), int(high), int(max_attempts), best)
+        return index
+
+    def import_json_files(self):
+        """One-time copy of the JSON records next to the database into a fresh one"""
+        directory = os.path.dirname(self.path)
+        history_path = os.path.join(directory, "game_history.jsonl")
+        legacy_history_path = os.path.join(directory, "game_history.json")
+        best_scores_path = os.path.join(directory, "best_scores.json")
+        best_times_path = os.path.join(directory, "best_times.json")
+        history_log = HistoryLog(history_path, legacy_history_path)
+        history_log.migrate_legacy()
+        batch = []
+        for record in history_log.iter_records():
+            if record is not None:
+                batch.append(self.row_for(record))
+            if len(batch) >= 10000:
+                self.insert_rows(batch)
+                batch = []
+        self.insert_rows(batch)
+        try:
+            for (low, high, max_attempts), best in BestScoreIndex.load(best_scores_path).scores.items():
+                self.upsert_best(low, high, max_attempts, best)
+            for (low, high, max_attempts), best in BestScoreIndex.load(best_times_path).scores.items():
+                self.upsert_best(low, high, max_attempts, best, 'best_times')
+        except Exception as e:
+            print(f"Error importing best scores: {e}")
+        self.set_meta('imported_json', '1')
+        self.conn.commit()
+
+    def row_for(self, record):
+        low, high = parse_range_key(record['range'])
+        extra = {key: value for key, value in record.items()
+                 if key not in self.COLUMNS and key != 'range'}
+        numbers = [record[field] for field in self.WIDE_FIELDS]
+        if not (fits_int64(low) and fits_int64(high)):
+            extra['range'] = record['range']
+            low = high = 0
+        for position, field in enumerate(self.WIDE_FIELDS):
+            if not fits_int64(numbers[position]):
+                extra[field] = numbers[position]
+                numbers[position] = 0
+        max_attempts, attempts_used, secret_number = numbers
+        return (record['date'], low, high, max_attempts, attempts_used,
+                int(record['won']), secret_number, json.dumps(extra) if extra else None)
+
+    def insert_rows(self, rows):
+        self.conn.executemany(
+            "INSERT INTO games (date, min_range, max_range, max_attempts, attempts_used, won,"
+            " secret_number, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def record_for(self, row):
+        date, low, high, max_attempts, attempts_used, won, secret_number, extra = row
+        record = {
+            'date': date,
+            'range': f"{low}-{high}",
+            'max_attempts': max_attempts,
+            'attempts_used': attempts_used,
+            'won': bool(won),
+            'secret_number': secret_number
+        }
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+    def append(self, game_record):
+        row = self.row_for(game_record)
+        self.recent_games.append(game_record)
+        self.stats.add(game_record)
+        self.stats.log_offset += 1
+        self.queue_write(lambda: self.insert_rows([row]))
+
+    def extend(self, records):
+        """Insert a batch of games in one statement and one commit"""
+        rows = []
+        for record in records:
+            rows.append(self.row_for(record))
+            self.recent_games.append(record)
+            self.stats.add(record)
+        self.stats.log_offset += len(rows)
+        self.queue_write(lambda: self.insert_rows(rows))
+
+    def queue_write(self, statement):
+        """Run a statement on the worker and commit it with the current stats"""
+        snapshot = self.stats.to_dict()
+        self.writer.submit(ordered=statement, key='commit', job=lambda: self.commit(snapshot))
+
+    def commit(self, snapshot=None):
+        """Commit pending games together with the stats snapshot that covers them"""
+        if self.conn is None:
+            return
+        self.set_meta('stats', json.dumps(snapshot or self.stats.to_dict()))
+        self.conn.commit()
+
+    def recent(self, count):
+        if count <= len(self.recent_games) or len(self.recent_games) < self.RECENT_CACHE:
+            return list(self.recent_games)[-count:]
+        self.writer.flush()
+        return self.query_recent(count)
+
+    def query_recent(self, count):
+        rows = self.conn.execute(
+            "SELECT date, min_range, max_range, max_attempts, attempts_used, won, secret_number, extra"
+            " FROM games ORDER BY id DESC LIMIT ?", (count,)).fetchall()
+        return [self.record_for(row) for row in reversed(rows)]
+
+    def iter_records(self):
+        """Every stored game, oldest first, streamed from the database"""
+        for record, _ in self.iter_after(0):
+            yield record
+
+    def iter_after(self, last_id):
+        """(record, id) for every game stored after the given row id, oldest first"""
+        self.writer.flush()
+        for row in self.conn.execute(
+                "SELECT date, min_range, max_range, max_attempts, attempts_used, won, secret_number, extra, id"
+                " FROM games WHERE id > ? ORDER BY id", (last_id,)):
+            yield self.record_for(row[:-1]), row[-1]
+
+    def record_best(self, min_range, max_range, max_attempts, attempts):
+        if not self.best_scores.record(min_range, max_range, max_attempts, attempts):
+            return False
+        self.queue_write(lambda: self.upsert_best(min_range, max_range, max_attempts, attempts))
+        return True
+
+    def record_best_time(self, min_range, max_range, max_attempts, duration_ms):
+        if not self.best_times.record(min_range, max_range, max_attempts, duration_ms):
+            return False
+        self.queue_write(lambda: self.upsert_best(min_range, max_range, max_attempts,
+                                                  duration_ms, 'best_times'))
+        return True
+
+    def record_bests(self, bests):
+        """Record a batch of wins ({(min, max, max_attempts): attempts}) as one write; returns the new bests"""
+        improved = {key: attempts for key, attempts in bests.items() if self.best_scores.record(*key, attempts)}
+
+        def upsert_all():
+            for (min_range, max_range, max_attempts), attempts in improved.items():
+                self.upsert_best(min_range, max_range, max_attempts, attempts)
+        if improved:
+            self.queue_write(upsert_all)
+        return improved
+
+    def upsert_best(self, min_range, max_range, max_attempts, attempts, table='best_scores'):
+        if not (fits_int64(min_range) and fits_int64(max_range) and fits_int64(max_attempts)):
+            self.conn.execute(
+                "INSERT INTO wide_bests (kind, min_range, max_range, max_attempts, best) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (kind, min_range, max_range, max_attempts)"
+                " DO UPDATE SET best = MIN(best, excluded.best)",
+                (table, str(min_range), str(max_range), str(max_attempts), attempts))
+            return
+        self.conn.execute(
+            f"INSERT INTO {table} (min_range, max_range, max_attempts, best) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (min_range, max_range, max_attempts)"
+            " DO UPDATE SET best = MIN(best, excluded.best)",
+            (min_range, max_range, max_attempts, attempts))
+
+    def load_stats(self):
+        """Use the stored snapshot if it matches the games table, else rebuild it"""
+        last_id = self.last_id()
+        snapshot = self.get_meta('stats')
+        self.stats.reset()
+        if snapshot is not None:
+            try:
+                self.stats.restore(json.loads(snapshot))
+                if self.stats.log_offset == last_id:
+                    return
+            except (ValueError, TypeError, KeyError):
+                self.stats.reset()
+        self.rebuild_stats(last_id)
+
+    def last_id(self):
+        return self.conn.execute("SELECT IFNULL(MAX(id), 0) FROM games").fetchone()[0]
+
+    def rebuild_stats(self, last_id):
+        stats = self.stats
+        stats.reset()
+        conn = self.conn
+        stats.total = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        wins, attempts_sum, best = conn.execute(
+            "SELECT COUNT(*), IFNULL(SUM(attempts_used), 0), MIN(attempts_used)"
+            " FROM games WHERE won = 1").fetchone()
+        stats.wins, stats.win_attempts_sum, stats.best_attempts = wins, attempts_sum, best
+        stats.current_streak = conn.execute(
+            "SELECT COUNT(*) FROM games"
+            " WHERE id > (SELECT IFNULL(MAX(id), 0) FROM games WHERE won = 0)").fetchone()[0]
+        # Consecutive wins share the same (position among all games - position among wins)
+        stats.longest_streak = conn.execute(
+            "SELECT IFNULL(MAX(run), 0) FROM (SELECT COUNT(*) AS run FROM ("
+            "  SELECT position - ROW_NUMBER() OVER (ORDER BY position) AS grp FROM ("
+            "    SELECT won, ROW_NUMBER() OVER (ORDER BY id) AS position FROM games)"
+            "  WHERE won = 1)"
+            " GROUP BY grp)").fetchone()[0]
+        days = stats.days
+        for day, day_games, day_wins in reversed(conn.execute(
+                "SELECT substr(date, 1, 10) AS day, COUNT(*), SUM(won) FROM games"
+                " GROUP BY day ORDER BY day DESC LIMIT ?", (days.size,)).fetchall()):
+            try:
+                days.add(days.day_number(day), day_games, day_wins)
+            except ValueError:
+                pass
+        stats.log_offset = last_id
+        self.commit()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        self.best_scores = BestScoreIndex()
+        self.best_times = BestScoreIndex()
+        self.recent_games.clear()
+        self.stats.reset()
+        self.queue_write(self.delete_all)
+
+    def delete_all(self):
+        # Row ids restart once the table is empty, so readers resuming by id check the generation
+        generation = int(self.get_meta('generation') or 0) + 1
+        self.set_meta('generation', str(generation))
+        self.conn.execute("DELETE FROM games")
+        self.conn.execute("DELETE FROM best_scores")
+        self.conn.execute("DELETE FROM best_times")
+        self.conn.execute("DELETE FROM wide_bests")
+
+    def report_write_error(self, error):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"Error saving data: {error}")
+
+    def close(self):
+        self.writer.close()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
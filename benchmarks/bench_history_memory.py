@@ -0,0 +1,64 @@
+"""Memory used by game history: list of dicts vs. CompactHistory.
+
+    python benchmarks/bench_history_memory.py [games ...]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import CompactHistory
+
+
+def make_records(count, seed=1):
+    """Records shaped like the ones json.load/json.loads produce"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    ranges = [(1, 20), (1, 50), (1, 100), (1, 1000), (10, 90)]
+    for i in range(count):
+        low, high = rng.choice(ranges)
+        max_attempts = rng.choice((5, 7, 10))
+        attempts_used = rng.randint(1, max_attempts)
+        # Build fresh strings per record, as a JSON parser would
+        yield {
+            'date': (start + timedelta(seconds=37 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+            'range': f"{low}-{high}",
+            'max_attempts': max_attempts,
+            'attempts_used': attempts_used,
+            'won': rng.random() < 0.6,
+            'secret_number': rng.randint(low, high)
+        }
+
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    container = build()
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return container, current, elapsed
+
+
+def main(sizes):
+    print(f"{'games':>10} {'dicts MB':>10} {'B/game':>7} {'compact MB':>11} {'B/game':>7} {'ratio':>6}"
+          f" {'iterate s':>10}")
+    for count in sizes:
+        records, dict_bytes, _ = measure(lambda: list(make_records(count)))
+        del records
+        history, compact_bytes, _ = measure(lambda: CompactHistory(make_records(count)))
+        started = time.perf_counter()
+        wins = sum(1 for game in history if game['won'])
+        iterate = time.perf_counter() - started
+        assert wins >= 0
+        print(f"{count:>10,} {dict_bytes / 1e6:>10.1f} {dict_bytes / count:>7.0f}"
+              f" {compact_bytes / 1e6:>11.1f} {compact_bytes / count:>7.0f}"
+              f" {dict_bytes / compact_bytes:>5.1f}x {iterate:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000])
@@ -0,0 +1,123 @@
+"""Widget updates per guess with and without the batching view model.
+
+    python benchmarks/bench_redraws.py [--games 200] [--spam 1,5,20]
+
+Plays the same games through the real NumberGuessingGame handlers on
+counting stub widgets. --spam is how many Enter presses Tk handles before it
+next goes idle: 1 is ordinary typing, larger values are Enter held down,
+where every extra press repeats an invalid (empty) guess. "direct" applies
+each update as soon as a handler asks, like the view did before batching;
+"batched" flushes once per idle cycle and skips unchanged values. With stub
+widgets the timings only cover the Python side; the saving in Tk is the
+configure calls and layout passes that are never made.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import StubWidget, load_gui
+
+WIDGET_CALLS = [0]
+
+
+class CountingWidget(StubWidget):
+    """Stub widget that counts config() calls"""
+
+    def config(self, *args, **kwargs):
+        WIDGET_CALLS[0] += 1
+
+    configure = config
+
+
+class IdleRoot(StubWidget):
+    """Stub root whose after_idle callbacks run when the benchmark says Tk is idle"""
+
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+        return len(self.idle)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for callback in idle:
+            callback()
+
+
+class DirectView:
+    """Applies every update immediately, one config() per request"""
+
+    def configure(self, widget, **options):
+        widget.config(**options)
+
+    def set_value(self, variable, value):
+        variable.set(value)
+        WIDGET_CALLS[0] += 1
+
+
+def play(game, root, games, spam, seed=1):
+    """Binary-search `games` games; returns (widget calls, guesses, seconds)"""
+    rng = random.Random(seed)
+    WIDGET_CALLS[0] = 0
+    guesses = 0
+    started = time.perf_counter()
+    for _ in range(games):
+        game.min_var.set("1")
+        game.max_var.set("100")
+        game.attempts_var.set("7")
+        game.start_game()
+        game.session.secret_number = rng.randint(1, 100)
+        root.run_idle()
+        low, high = 1, 100
+        while game.session.active:
+            guess = (low + high) // 2
+            game.guess_var.set(str(guess))
+            for _ in range(spam):
+                # The first press submits the guess, the rest find an empty entry
+                game.make_guess()
+                guesses += 1
+            root.run_idle()
+            if guess < game.session.secret_number:
+                low = guess + 1
+            else:
+                high = guess - 1
+        root.run_idle()
+    return WIDGET_CALLS[0], guesses, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--spam', default="1,5,20", help="Enter presses per idle cycle (comma-separated)")
+    args = parser.parse_args(argv)
+
+    gui, _ = load_gui(stub_tk=True)
+    for name in ('Label', 'Button', 'Entry', 'Frame', 'Canvas', 'Text', 'Checkbutton'):
+        setattr(gui.tk, name, CountingWidget)
+    os.chdir(tempfile.mkdtemp(prefix="bench-redraws-"))
+
+    print(f"{args.games} games of 1-100 in 7 attempts")
+    print(f"{'spam':>5} {'view':>8} {'presses':>8} {'updates':>8} {'per press':>10} {'flushes':>8} {'µs/press':>9}")
+    for spam in [int(value) for value in args.spam.split(",")]:
+        for mode in ('direct', 'batched'):
+            root = IdleRoot()
+            game = gui.NumberGuessingGame(root, lazy=False)
+            if mode == 'direct':
+                game.view = DirectView()
+            root.run_idle()
+            calls, presses, elapsed = play(game, root, args.games, spam)
+            # Without batching every update is its own pass
+            flushes = f"{game.view.redraws:,}" if mode == 'batched' else "-"
+            print(f"{spam:>5} {mode:>8} {presses:>8,} {calls:>8,} {calls / presses:>10.2f}"
+                  f" {flushes:>8} {elapsed / presses * 1e6:>9.1f}")
+            game.close()
+
+
+if __name__ == "__main__":
+    main()
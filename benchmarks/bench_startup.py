@@ -0,0 +1,113 @@
+"""Startup benchmark: line-item gradient vs. cached PhotoImage gradient.
+
+Needs a display (run under Xvfb on headless machines):
+    xvfb-run python benchmarks/bench_startup.py
+"""
+import importlib.util
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# code.py shadows the standard library 'code' module, so load it by path
+spec = importlib.util.spec_from_file_location("guessing_game", os.path.join(ROOT, "code.py"))
+game = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(game)
+
+
+def legacy_gradient(canvas):
+    """The original gradient: 800 create_line items, re-parsing hex per line"""
+    def interpolate_color(color1, color2, factor):
+        def hex_to_rgb(hex_color):
+            hex_color = hex_color.lstrip('#')
+            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        rgb1 = hex_to_rgb(color1)
+        rgb2 = hex_to_rgb(color2)
+        rgb = tuple(int(rgb1[i] + factor * (rgb2[i] - rgb1[i])) for i in range(3))
+        return '#%02x%02x%02x' % rgb
+
+    for i in range(800):
+        canvas.create_line(0, i, 700, i, fill=interpolate_color('#2C3E50', '#34495E', i / 800), width=1)
+
+
+def image_gradient(canvas):
+    image = game.gradient_image(canvas, '#2C3E50', '#34495E', 700, 800)
+    canvas.create_image(0, 0, image=image, anchor='nw')
+    canvas.gradient_image = image
+
+
+def time_gradient(root, draw, repeat, before=None):
+    draw_times, redraw_times = [], []
+    for _ in range(repeat):
+        if before:
+            before()
+        canvas = tk.Canvas(root, width=700, height=800, highlightthickness=0)
+        canvas.pack()
+        started = time.perf_counter()
+        draw(canvas)
+        root.update()
+        draw_times.append(time.perf_counter() - started)
+
+        # Force a full repaint of the canvas to measure redraw cost
+        started = time.perf_counter()
+        canvas.move('all', 0, 0)
+        canvas.event_generate('<Expose>')
+        root.update()
+        redraw_times.append(time.perf_counter() - started)
+        items = len(canvas.find_all())
+        canvas.destroy()
+    return statistics.median(draw_times), statistics.median(redraw_times), items
+
+
+def time_window(repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        root = tk.Tk()
+        game.NumberGuessingGame(root)
+        root.update()
+        times.append(time.perf_counter() - started)
+        root.destroy()
+    return statistics.median(times)
+
+
+def main(repeat=10):
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); run under xvfb-run")
+        return 1
+
+    def cold():
+        game._gradient_images.clear()
+        shutil.rmtree(game.GRADIENT_CACHE_DIR, ignore_errors=True)
+
+    def disk_only():
+        game._gradient_images.clear()
+
+    rows = [
+        ("800 line items (old)", time_gradient(root, legacy_gradient, repeat)),
+        ("image, cold cache", time_gradient(root, image_gradient, repeat, cold)),
+        ("image, disk cache", time_gradient(root, image_gradient, repeat, disk_only)),
+        ("image, memory cache", time_gradient(root, image_gradient, repeat)),
+    ]
+    root.destroy()
+
+    print(f"{'gradient':<24} {'draw ms':>9} {'redraw ms':>10} {'items':>6}")
+    for name, (draw, redraw, items) in rows:
+        print(f"{name:<24} {draw * 1000:>9.2f} {redraw * 1000:>10.2f} {items:>6}")
+    print(f"\nFull window construction + first update: {time_window(repeat) * 1000:.1f} ms")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
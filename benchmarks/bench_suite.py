@@ -0,0 +1,329 @@
+"""Benchmark suite for the engine, persistence and UI refresh paths.
+
+    python benchmarks/bench_suite.py [--sizes 10,1000,100000,1000000] [--output FILE]
+                                     [--compare BASELINE.json] [--stub-tk]
+
+Every case is timed as the median of several rounds and the results are
+written as JSON (benchmarks/results/<timestamp>.json by default), so two runs
+can be compared with --compare. Tk cases use a real Tk when a display is
+available (e.g. under xvfb-run) and otherwise stub the widgets out, which
+still measures the Python side of a redraw; the mode is recorded in the file.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backends import JsonBackend, SqliteBackend
+from bench_history_memory import make_records
+from game_engine import GameEngine, GameSession
+from storage import JsonArrayReader
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_SIZES = [10, 1000, 100000, 1000000]
+
+
+class StubWidget:
+    """Accepts any widget call and does nothing"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return self._ignore
+
+    def _ignore(self, *args, **kwargs):
+        return ''
+
+
+class StubVar:
+    # Like tkinter.Variable, which defines __eq__ and so isn't hashable
+    __hash__ = None
+
+    def __init__(self, master=None, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class StubModule(types.ModuleType):
+    """Stand-in for tkinter/ttk: every widget class is a StubWidget"""
+
+    def __getattr__(self, name):
+        return StubWidget
+
+
+def install_tk_stubs():
+    tk = StubModule("tkinter")
+    tk.StringVar = tk.DoubleVar = tk.IntVar = tk.BooleanVar = StubVar
+    tk.TclError = RuntimeError
+    for name in ('END', 'BOTH', 'X', 'Y', 'LEFT', 'RIGHT', 'WORD'):
+        setattr(tk, name, name.lower())
+    messagebox = types.ModuleType("tkinter.messagebox")
+    for name in ('showerror', 'showinfo', 'askyesno', 'askokcancel'):
+        setattr(messagebox, name, lambda *args, **kwargs: True)
+    tk.messagebox = messagebox
+    tk.ttk = StubModule("tkinter.ttk")
+    sys.modules.update({'tkinter': tk, 'tkinter.messagebox': messagebox, 'tkinter.ttk': tk.ttk})
+
+
+def load_gui(stub_tk):
+    """Import code.py (by path, it shadows the stdlib 'code'); returns (module, root)"""
+    root = None
+    if not stub_tk:
+        import tkinter
+        try:
+            root = tkinter.Tk()
+        except tkinter.TclError:
+            root = None
+    if root is None:
+        install_tk_stubs()
+        root = StubWidget()
+    spec = importlib.util.spec_from_file_location("guessing_game", os.path.join(ROOT, "code.py"))
+    gui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui)
+    return gui, root
+
+
+def measure(func, number=1, repeat=5, setup=None):
+    """Median and best seconds per call over `repeat` rounds of `number` calls"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - started) / number)
+    return statistics.median(times), min(times)
+
+
+class Suite:
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.results = []
+
+    def add(self, name, timing, **params):
+        median, best = timing
+        self.results.append({'name': name, 'params': params, 'seconds': median, 'best': best,
+                             'ops_per_sec': 1 / median if median else None})
+        label = name + ("[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]" if params else "")
+        print(f"  {label:<48} {median * 1e6:>12.2f} us  {1 / median if median else 0:>12,.1f}/s")
+
+    def fresh_dir(self, name):
+        path = os.path.join(self.workdir, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        os.chdir(path)
+        return path
+
+
+def write_history(count):
+    """A JSON-Lines history and a legacy JSON array file with `count` games"""
+    with open("game_history.jsonl", "w", encoding="utf-8") as f:
+        for record in make_records(count):
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    with open("legacy.json", "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, record in enumerate(make_records(count)):
+            f.write(("," if i else "") + json.dumps(record))
+        f.write("]")
+
+
+def bench_session(suite):
+    session = GameSession(1, 10 ** 6, 10 ** 9, secret_number=0)
+    suite.add("session_guess", measure(lambda: session.guess(500000), number=100000))
+    # Per-guess cost should not grow with the range, even past 64 bits
+    for digits in (18, 100):
+        session = GameSession(1, 10 ** digits, 10 ** 9, secret_number=0)
+        guess = str(10 ** digits // 2)
+        suite.add("session_guess", measure(lambda: session.guess(guess), number=100000), digits=digits)
+
+
+def bench_history(suite, count):
+    """Load, record and save costs against a history of `count` games"""
+    suite.fresh_dir(f"history-{count}")
+    write_history(count)
+
+    repeat = 3 if count >= 100000 else 5
+    suite.add("json_load", measure(lambda: JsonBackend().load().close(), repeat=repeat), history=count)
+
+    def legacy_json_load():
+        with open("legacy.json", "r", encoding="utf-8") as f:
+            json.load(f)
+    suite.add("legacy_json_load", measure(legacy_json_load, repeat=repeat), history=count)
+    suite.add("legacy_stream_load",
+              measure(lambda: sum(1 for _ in JsonArrayReader("legacy.json")), repeat=repeat),
+              history=count)
+
+    for name, backend_class in (('json', JsonBackend), ('sqlite', SqliteBackend)):
+        engine = GameEngine(backend_class()).load()
+        sessions = []
+
+        def play(games=200):
+            sessions.clear()
+            for i in range(games):
+                session = GameSession(1, 100, 7, secret_number=50)
+                session.guess(50 if i % 2 else 1)
+                while session.active:
+                    session.guess(1)
+                sessions.append(session)
+        play()
+
+        # Caller-side cost: in-memory update plus queueing the write
+        pending = iter(sessions)
+        suite.add("record_result", measure(lambda: engine.record_result(next(pending)),
+                                           number=len(sessions), repeat=1),
+                  history=count, backend=name)
+
+        # Writer-side cost of persisting one game (history line, snapshots, commit)
+        def save_batch():
+            for session in sessions:
+                engine.record_result(session)
+            started = time.perf_counter()
+            engine.backend.writer.flush()
+            return time.perf_counter() - started
+        save_times = [save_batch() / len(sessions) for _ in range(3)]
+        suite.add("save_data", (statistics.median(save_times), min(save_times)),
+                  history=count, backend=name)
+        engine.close()
+
+
+def bench_gui(suite, gui, root, count):
+    """Panel redraws and make_guess with `count` games of history on disk"""
+    suite.fresh_dir(f"gui-{count}")
+    write_history(count)
+    best_scores = [[1, high, attempts, 3] for high in range(20, 20 + min(count, 2000))
+                   for attempts in (5, 10)]
+    with open("best_scores.json", "w", encoding="utf-8") as f:
+        json.dump({'version': 2, 'scores': best_scores}, f)
+
+    game = gui.NumberGuessingGame(root, lazy=False, backend=JsonBackend())
+    suite.add("update_stats_display", measure(game.update_stats_display, number=200), history=count)
+    suite.add("update_scores_display", measure(game.update_scores_display, number=50), history=count)
+    suite.add("update_scores_display_range",
+              measure(lambda: game.update_scores_display((1, 50)), number=200), history=count)
+
+    def play_game():
+        game.min_var.set("1")
+        game.max_var.set("100")
+        game.attempts_var.set("7")
+        game.start_game()
+        game.session.secret_number = 100
+        for guess in (50, 75, 88, 94, 97, 99, 100):
+            game.guess_var.set(str(guess))
+            game.make_guess()
+    suite.add("make_guess_game", measure(play_game, number=20), history=count)
+    game.close()
+    for child in root.winfo_children() or ():
+        child.destroy()
+
+
+def bench_gradient(suite, gui, root, real_tk):
+    suite.add("gradient_ppm", measure(lambda: gui.gradient_ppm('#2C3E50', '#34495E', 700, 800)))
+    if not real_tk:
+        return
+
+    def cold():
+        gui._gradient_images.clear()
+        shutil.rmtree(gui.GRADIENT_CACHE_DIR, ignore_errors=True)
+
+    draw = lambda: gui.gradient_image(root, '#2C3E50', '#34495E', 700, 800)
+    suite.add("gradient_image", measure(draw, setup=cold), cache='cold')
+    suite.add("gradient_image", measure(draw, setup=gui._gradient_images.clear), cache='disk')
+    suite.add("gradient_image", measure(draw, number=100), cache='memory')
+
+
+def result_key(result):
+    return result['name'] + json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change against a previous run; returns the number of regressions"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        # Best-of-rounds is less noisy than the median for spotting slowdowns
+        change = result['best'] / old['best'] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {result_key(result):<64} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated history sizes")
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier results file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="slowdown reported as a regression (default 0.10 = 10%%)")
+    parser.add_argument('--stub-tk', action='store_true', help="stub widgets even if a display exists")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    gui, root = load_gui(args.stub_tk)
+    real_tk = not isinstance(root, StubWidget)
+    workdir = tempfile.mkdtemp(prefix="guessing-bench-")
+    suite = Suite(workdir)
+    print(f"Tk: {'real' if real_tk else 'stubbed'}; working in {workdir}")
+    try:
+        bench_session(suite)
+        bench_gradient(suite, gui, root, real_tk)
+        for count in sizes:
+            bench_history(suite, count)
+            bench_gui(suite, gui, root, count)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({'meta': {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': git_commit(),
+                            'python': platform.python_version(), 'platform': platform.platform(),
+                            'tk': 'real' if real_tk else 'stub', 'sizes': sizes},
+                   'results': suite.results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        return 1 if compare(suite.results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
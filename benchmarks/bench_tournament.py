@@ -0,0 +1,51 @@
+"""Tournament throughput against the number of worker processes.
+
+    python benchmarks/bench_tournament.py [--matches 20000] [--workers 1,2,4,8] [--records]
+
+Plays the same tournament (same seed, so the same games) with each worker
+count and prints matches per second, the speedup over one worker and the
+parallel efficiency. Worker counts above the number of CPUs are skipped
+unless listed explicitly. --records also ships every game record back to the
+parent, which is what a saved tournament pays for.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator import STRATEGIES
+from tournament import Tournament
+
+CONFIGS = [(1, 100, 7), (1, 1000000, 20)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--matches', type=int, default=20000, help="matches per strategy and setting")
+    parser.add_argument('--workers', help="comma-separated worker counts (default: powers of two up to the CPUs)")
+    parser.add_argument('--records', action='store_true', help="send game records back to the parent")
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        counts = [1 << i for i in range(cpus.bit_length()) if 1 << i <= cpus]
+        if counts[-1] != cpus:
+            counts.append(cpus)
+
+    print(f"{cpus} CPUs, {args.matches:,} matches per strategy and setting, records {'on' if args.records else 'off'}")
+    print(f"{'workers':>8} {'seconds':>9} {'matches/s':>11} {'speedup':>8} {'efficiency':>11}")
+    baseline = None
+    for workers in counts:
+        tournament = Tournament(list(STRATEGIES), CONFIGS, args.matches, seed=1)
+        tournament.run(workers, keep_records=args.records)
+        rate = tournament.games / tournament.elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {tournament.elapsed:>9.2f} {rate:>11,.0f} {rate / baseline:>7.2f}x"
+              f" {rate / baseline / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,284 @@
+import time
+_IMPORTS_STARTED = time.perf_counter()
+
+import argparse
+import bisect
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
-import json
 import os
-from datetime import datetime
+import sys
+from collections import deque
+import metrics
+from backends import load_config, open_backend
+from difficulty import DEFAULT_PROFILE, PROFILES, get_profile
+from game_engine import GameEngine, GENERATORS, MODE_CLASSIC, MODE_SPEEDRUN, MODE_TIMED, SettingsError
+from profiles import DEFAULT_PLAYER, ProfileStore
+from scores import format_range, parse_range_key
+from view_model import ViewModel
+
+GRADIENT_CACHE_DIR = ".gradient_cache"
+
+# How often the view checks for errors from the background writer
+SAVE_ERROR_POLL_MS = 500
+
+# How often --metrics rewrites its Prometheus file, and the diagnostics window refreshes
+METRICS_EXPORT_MS = 5000
+DIAGNOSTICS_REFRESH_MS = 1000
+
+# Mode choices in the setup card: label -> (mode, time limit in seconds)
+GAME_MODES = {
+    "Classic": (MODE_CLASSIC, None),
+    "Timed 30s": (MODE_TIMED, 30),
+    "Timed 60s": (MODE_TIMED, 60),
+    "Speed-run": (MODE_SPEEDRUN, None),
+}
+
+# Countdown refresh; ticks are aligned to the session clock so they don't drift
+TIMER_TICK_MS = 100
+
+# Rendered gradient images keyed by (top, bottom, width, height)
+_gradient_images = {}
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def gradient_ppm(top_color, bottom_color, width, height):
+    """Render a vertical gradient as binary PPM bytes, one row buffer per line"""
+    rgb1 = hex_to_rgb(top_color)
+    rgb2 = hex_to_rgb(bottom_color)
+    rows = []
+    for i in range(height):
+        factor = i / height
+        rgb = bytes(int(rgb1[c] + factor * (rgb2[c] - rgb1[c])) for c in range(3))
+        rows.append(rgb * width)
+    return b"P6 %d %d 255\n" % (width, height) + b"".join(rows)
+
+
+def gradient_image(master, top_color, bottom_color, width, height):
+    """PhotoImage of a gradient, cached in memory and as a PPM file on disk"""
+    key = (top_color, bottom_color, width, height)
+    image = _gradient_images.get(key)
+    if image is not None:
+        return image
+    
+    cache_path = os.path.join(GRADIENT_CACHE_DIR, "%s_%s_%dx%d.ppm" % (
+        top_color.lstrip('#'), bottom_color.lstrip('#'), width, height))
+    try:
+        image = tk.PhotoImage(master=master, file=cache_path)
+    except (tk.TclError, OSError):
+        data = gradient_ppm(top_color, bottom_color, width, height)
+        image = tk.PhotoImage(master=master, data=data, format='ppm')
+        try:
+            os.makedirs(GRADIENT_CACHE_DIR, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Could not cache gradient: {e}")
+    
+    _gradient_images[key] = image
+    return image
+
+class StartupProfiler:
+    """Per-phase startup timings reported by --profile-startup"""
+    
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.phases = []
+    
+    def mark(self, phase):
+        """Close the phase that ran since the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+    
+    def add(self, phase, seconds):
+        """Record a phase that ran off the main thread"""
+        self.phases.append((phase, seconds))
+    
+    def report(self):
+        print("⏱️ Startup profile")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<32} {seconds * 1000:8.1f} ms")
+        print(f"  {'time to fully loaded':<32} {(time.perf_counter() - self.started) * 1000:8.1f} ms")
+
+
+class HallOfFameView:
+    """Paged Hall of Fame text view.
+    
+    Only one page of ranges is ever inserted into the Text widget, and after a
+    win just the changed range entry is rewritten, so redraw cost does not grow
+    with the number of records.
+    """
+    
+    PAGE_SIZE = 8
+    RECENT_GAMES = 5
+    
+    def __init__(self, game, scores_text, page_label):
+        self.game = game
+        self.text = scores_text
+        self.page_label = page_label
+        self.page = 0
+        self.query = ""
+        self.keys = []
+        self.key_count = 0
+        self.matches = None
+    
+    def reload(self):
+        """Pick up the index's sorted ranges (after loading or clearing records)"""
+        self.keys = self.game.engine.best_scores.ranges
+        self.key_count = len(self.keys)
+        self.apply_search(self.query)
+    
+    @property
+    def visible_keys(self):
+        return self.keys if self.matches is None else self.matches
+    
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.visible_keys) // self.PAGE_SIZE))
+    
+    def apply_search(self, query):
+        """Filter by difficulty (e.g. 'HARD') or range text such as '1-100' or '50'"""
+        self.query = query.strip().replace(' ', '')
+        self.page = 0
+        best_scores = self.game.engine.best_scores
+        if not self.query:
+            self.matches = None
+        elif self.query.upper() in self.game.engine.profile.bucket_names:
+            self.matches = best_scores.ranges_in_bucket(self.query.upper(), self.game.engine.profile.buckets)
+        else:
+            self.matches = [key for key in self.keys if self.matches_query(key)]
+            try:
+                number_range = parse_range_key(self.query)
+            except ValueError:
+                number_range = None
+            if number_range in best_scores:
+                self.page = bisect.bisect_left(self.matches, number_range) // self.PAGE_SIZE
+        self.render()
+    
+    def matches_query(self, number_range):
+        """True when a range passes the current search (difficulty name or range text)"""
+        profile = self.game.engine.profile
+        if self.query.upper() in profile.bucket_names:
+            low, high = number_range
+            return profile.difficulty(high - low + 1)[0] == self.query.upper()
+        return self.query in format_range(number_range)
+    
+    def show_page(self, page):
+        page = min(max(page, 0), self.page_count - 1)
+        if page != self.page:
+            self.page = page
+            self.render()
+    
+    def render(self):
+        """Draw the current page of ranges plus the recent activity"""
+        text = self.text
+        text.delete(1.0, tk.END)
+        self.update_page_label()
+        
+        if not self.game.engine.best_scores:
+            text.insert(tk.END, "🏆 No records yet! Play some games to see your achievements!\n\n"
+                                "🎯 Tips:\n"
+                                "• Try different difficulty levels\n"
+                                "• Challenge yourself with larger ranges\n"
+                                "• See how few attempts you can win in!\n")
+            return
+        
+        text.insert(tk.END, "🏅 HALL OF FAME - Best Scores by Difficulty 🏅\n" + "=" * 50 + "\n\n")
+        start = self.page * self.PAGE_SIZE
+        page_keys = self.visible_keys[start:start + self.PAGE_SIZE]
+        if not page_keys:
+            text.insert(tk.END, f"🔍 No ranges match '{self.query}'\n\n")
+        for number_range in page_keys:
+            text.insert(tk.END, self.entry_text(number_range), ('entry:' + format_range(number_range),))
+        text.insert(tk.END, self.recent_text(), ('recent',))
+    
+    def update_page_label(self):
+        self.page_label.config(text=f"Page {self.page + 1}/{self.page_count}")
+    
+    def update_range(self, number_range):
+        """Refresh after a game: rewrite one entry if it is on screen"""
+        if not self.keys:
+            return
+        
+        # The index inserts new ranges into self.keys in place
+        added = len(self.keys) != self.key_count
+        self.key_count = len(self.keys)
+        if added:
+            if self.matches is not None and self.matches_query(number_range):
+                bisect.insort(self.matches, number_range)
+            if self.key_count == 1 or self.is_new_on_page(number_range):
+                # A new range shifts the page contents, so redraw the (bounded) page
+                self.render()
+                return
+            # A range on a later page leaves this one as it is, but adds to the page count
+            self.update_page_label()
+        
+        tag = 'entry:' + format_range(number_range)
+        if self.text.tag_ranges(tag):
+            self.replace_tagged(tag, self.entry_text(number_range))
+        self.replace_tagged('recent', self.recent_text())
+    
+    def is_new_on_page(self, number_range):
+        """True when a just-added range lands on or before the page being shown"""
+        position = bisect.bisect_left(self.keys, number_range)
+        return position < (self.page + 1) * self.PAGE_SIZE
+    
+    def replace_tagged(self, tag, content):
+        ranges = self.text.tag_ranges(tag)
+        if not ranges:
+            return
+        start, end = ranges[0], ranges[-1]
+        self.text.delete(start, end)
+        self.text.insert(start, content, (tag,))
+    
+    def entry_text(self, number_range):
+        low, high = number_range
+        range_size = high - low + 1
+        
+        # Determine difficulty emoji
+        name, emoji = self.game.engine.profile.difficulty(range_size)
+        lines = [f"{emoji} {name} Range {low} - {high} ({range_size:,} numbers)\n",
+                 "-" * 40 + "\n"]
+        
+        for max_attempts, best_score in self.game.engine.best_scores.entries(number_range):
+            # Calculate efficiency
+            efficiency = (best_score / max_attempts) * 100
+            if efficiency <= 30:
+                efficiency_emoji = "⭐⭐⭐"
+            elif efficiency <= 50:
+                efficiency_emoji = "⭐⭐"
+            else:
+                efficiency_emoji = "⭐"
+            
+            best_time = self.game.engine.best_times.get(low, high, max_attempts)
+            timing = f" ⏱️ {best_time / 1000:.2f}s" if best_time is not None else ""
+            lines.append(f"  🎯 {max_attempts} max attempts: {best_score} attempts {efficiency_emoji}{timing}\n")
+        
+        lines.append("\n")
+        return "".join(lines)
+    
+    def recent_text(self):
+        recent_games = self.game.engine.recent_games(self.RECENT_GAMES)
+        if not recent_games:
+            return ""
+        
+        lines = ["\n📊 RECENT ACTIVITY\n", "=" * 20 + "\n"]
+        for game in reversed(recent_games):
+            status = "🏆 WON" if game['won'] else "❌ LOST"
+            date = game['date'].split(' ')[0]  # Just the date part
+            lines.append(f"{status} | {game['range']} | {game['attempts_used']} attempts | {date}\n")
+        return "".join(lines)
+
 
 class NumberGuessingGame:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None, lazy=True, backend=None, metrics_path=None, profiles=None,
+                 generator='random'):
         self.root = root
         self.root.title("🎯 Number Guessing Game")
         self.root.geometry("700x800")
@@ -31,21 +303,113 @@ class NumberGuessingGame:
         
         # Configure root
         self.root.configure(bg=self.colors['bg_primary'])
-        
-        # Game variables
-        self.min_range = 1
-        self.max_range = 100
-        self.max_attempts = 10
-        self.secret_number = 0
-        self.attempts_left = 0
-        self.current_attempts = 0
-        self.game_active = False
-        self.best_scores = self.load_best_scores()
-        self.game_history = self.load_game_history()
+        self.save_errors = deque()
+        # Widget changes are applied once per idle cycle, skipping unchanged values
+        self.view = ViewModel(self.root.after_idle)
+        
+        # Game state lives in the headless engine; this class is only the view
+        # Saves run on a background thread, so errors come back through a queue
+        self.profiles = profiles
+        self.player = DEFAULT_PLAYER
+        if profiles is None:
+            self.engine = GameEngine(backend, on_error=self.save_errors.append)
+        else:
+            # The current player's engine is picked up from the profile store when loading
+            profiles.on_error = self.save_errors.append
+            self.engine = None
+        self.session = None
+        self.profiler = profiler
+        self.panels_ready = False
+        self._loader = None
+        self._load_error = None
+        self._timer_job = None
+        self.generator = generator
+        
+        # Feedback tones reported by the engine
+        self.tone_colors = {
+            'warning': self.colors['warning'],
+            'hint': self.colors['accent_blue'],
+            'success': self.colors['success'],
+            'danger': self.colors['danger']
+        }
         
         self.setup_styles()
+        self.mark_startup("style setup")
         self.setup_ui()
         self.show_setup_frame()
+        self.mark_startup("widget build")
+        
+        if lazy:
+            # Show the setup card right away; records load in the background
+            self.view.configure(self.start_button, state="disabled", bg='gray')
+            self.view.configure(self.info_label, text="⏳ Loading your records...")
+            self.start_loader(self.load_records)
+            self.root.after(20, self.poll_records)
+        else:
+            self.load_records()
+            self.on_records_loaded()
+        self.root.after(SAVE_ERROR_POLL_MS, self.poll_save_errors)
+        
+        # Instrumentation: F12 opens the diagnostics window, --metrics exports to a file
+        self.diagnostics = None
+        self.metrics_exporter = None
+        self.root.bind('<F12>', lambda e: self.show_diagnostics())
+        if metrics_path:
+            metrics.enable()
+            writer = self.engine.backend.writer if profiles is None else profiles.writer
+            self.metrics_exporter = metrics.MetricsExporter(metrics_path, writer)
+            self.root.after(METRICS_EXPORT_MS, self.export_metrics)
+    
+    def mark_startup(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+    
+    def load_records(self):
+        """Read history, best scores and stats (runs off the main thread when lazy)"""
+        started = time.perf_counter()
+        if self.profiles is None:
+            self.engine.load()
+        else:
+            # Building the leaderboard may cycle every profile through the cache
+            self.profiles.load_leaderboard()
+            self.engine = self.profiles.get(self.player)
+        if self.profiler is not None:
+            self.profiler.add("JSON load (background)" if self._loader else "JSON load",
+                              time.perf_counter() - started)
+    
+    def start_loader(self, target, *args):
+        """Run a load on a background thread, keeping any error for the poll on the Tk thread"""
+        def run():
+            try:
+                target(*args)
+            except Exception as e:
+                self._load_error = e
+        self._load_error = None
+        self._loader = threading.Thread(target=run, daemon=True)
+        self._loader.start()
+    
+    def poll_records(self):
+        # Tk must only be touched from the main thread, so poll for the loader
+        if self._loader.is_alive():
+            self.root.after(20, self.poll_records)
+            return
+        if self._load_error is not None:
+            messagebox.showerror("Load Error", f"Could not load your records: {self._load_error}")
+            if self.engine is None:
+                self.view.configure(self.info_label, text="❌ Your records could not be loaded")
+                return
+        self.on_records_loaded()
+    
+    def on_records_loaded(self):
+        """Build the stats and Hall of Fame panels once the records are in"""
+        if self.profiler is not None:
+            self.profiler.last = time.perf_counter()
+        self.build_panels()
+        self.mark_startup("stats + scores panels")
+        self.view.configure(self.start_button, state="normal", bg=self.colors['accent_green'])
+        self.view.configure(self.info_label, text="🎲 Click 'START NEW GAME' to begin your adventure!")
+        if self.profiler is not None:
+            self.profiler.report()
     
     def setup_styles(self):
         style = ttk.Style()
@@ -107,6 +471,7 @@ class NumberGuessingGame:
         # Scrollable frame
         main_frame = tk.Frame(main_canvas, bg=self.colors['bg_primary'])
         main_canvas.create_window(350, 0, window=main_frame, anchor='n')
+        self.main_frame = main_frame
         
         # Title with emoji and gradient
         title_frame = tk.Frame(main_frame, bg=self.colors['bg_primary'], height=80)
@@ -143,11 +508,34 @@ class NumberGuessingGame:
         self.max_entry = self.create_styled_entry(setup_content, self.max_var)
         self.max_entry.grid(row=1, column=1, padx=(10, 0), pady=5, sticky='w')
         
+        # 'auto' gives floor(log2(range size)) + 1, enough for a perfect binary search
         self.create_input_row(setup_content, "💪 Maximum Attempts:", self.colors['accent_purple'], 2)
-        self.attempts_var = tk.StringVar(value="10")
+        self.attempts_var = tk.StringVar(value="auto")
         self.attempts_entry = self.create_styled_entry(setup_content, self.attempts_var)
         self.attempts_entry.grid(row=2, column=1, padx=(10, 0), pady=5, sticky='w')
         
+        self.create_input_row(setup_content, "⏱️ Mode:", self.colors['accent_blue'], 3)
+        self.mode_var = tk.StringVar(value="Classic")
+        self.mode_box = ttk.Combobox(setup_content, textvariable=self.mode_var,
+                                     values=list(GAME_MODES), state='readonly', width=14)
+        self.mode_box.grid(row=3, column=1, padx=(10, 0), pady=5, sticky='w')
+        
+        # Draw secrets from the OS's CSPRNG instead of the Mersenne Twister
+        self.secure_var = tk.BooleanVar(value=self.generator == 'secrets')
+        tk.Checkbutton(setup_content, text="🔐 Secure", variable=self.secure_var,
+                       font=('Arial', 10), bg=self.colors['bg_card'],
+                       activebackground=self.colors['bg_card']).grid(row=3, column=2, padx=(10, 0), sticky='w')
+        
+        # Player profile: pick one or type a new name
+        if self.profiles is not None:
+            self.create_input_row(setup_content, "👤 Player:", self.colors['accent_orange'], 4)
+            self.player_var = tk.StringVar(value=self.player)
+            self.player_box = ttk.Combobox(setup_content, textvariable=self.player_var,
+                                           values=self.profiles.players(), width=14)
+            self.player_box.grid(row=4, column=1, padx=(10, 0), pady=5, sticky='w')
+            self.player_box.bind('<<ComboboxSelected>>', lambda e: self.switch_player())
+            self.player_box.bind('<Return>', lambda e: self.switch_player())
+        
         # Start button
         self.start_button = tk.Button(setup_content,
                                      text="🚀 START NEW GAME",
@@ -159,7 +547,7 @@ class NumberGuessingGame:
                                      padx=20, pady=10,
                                      command=self.start_game,
                                      cursor='hand2')
-        self.start_button.grid(row=3, column=0, columnspan=2, pady=(20, 0))
+        self.start_button.grid(row=5, column=0, columnspan=3, pady=(20, 0))
         
         # Game Card
         self.game_card = self.create_card(main_frame, "🎮 Game Arena", self.colors['accent_purple'])
@@ -176,6 +564,14 @@ class NumberGuessingGame:
                                   wraplength=400)
         self.info_label.pack(pady=(0, 15))
         
+        # Clock for timed and speed-run games
+        self.timer_label = tk.Label(game_content,
+                                   text="",
+                                   font=('Arial', 16, 'bold'),
+                                   fg=self.colors['accent_red'],
+                                   bg=self.colors['bg_card'])
+        self.timer_label.pack()
+        
         # Guess input with styling
         guess_frame = tk.Frame(game_content, bg=self.colors['bg_card'])
         guess_frame.pack(pady=10)
@@ -189,7 +585,7 @@ class NumberGuessingGame:
         self.guess_entry = tk.Entry(guess_frame,
                                    textvariable=self.guess_var,
                                    font=('Arial', 14, 'bold'),
-                                   width=12,
+                                   width=22,
                                    justify='center',
                                    relief='raised',
                                    borderwidth=2,
@@ -240,6 +636,9 @@ class NumberGuessingGame:
                                       bg=self.colors['bg_card'],
                                       wraplength=400)
         self.feedback_label.pack(pady=(15, 0))
+    
+    def build_panels(self):
+        main_frame = self.main_frame
         
         # Statistics Card
         self.stats_card = self.create_card(main_frame, "📊 Game Statistics", self.colors['accent_orange'])
@@ -257,6 +656,9 @@ class NumberGuessingGame:
         self.create_stat_box(self.stats_frame, "⚡", "Best Score", "N/A", self.colors['accent_orange'], 1, 0)
         self.create_stat_box(self.stats_frame, "📈", "Avg Attempts", "N/A", self.colors['accent_red'], 1, 1)
         self.create_stat_box(self.stats_frame, "🔥", "Current Streak", "0", self.colors['accent_green'], 1, 2)
+        self.create_stat_box(self.stats_frame, "🏅", "Longest Streak", "0", self.colors['accent_purple'], 2, 0)
+        self.create_stat_box(self.stats_frame, "📅", "Games Today", "0", self.colors['accent_blue'], 2, 1)
+        self.create_stat_box(self.stats_frame, "📆", "7-Day Win Rate", "N/A", self.colors['success'], 2, 2)
         
         # Best Scores Card
         self.scores_card = self.create_card(main_frame, "🏅 Hall of Fame", self.colors['accent_red'])
@@ -283,6 +685,35 @@ class NumberGuessingGame:
         scores_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.scores_text.configure(yscrollcommand=scores_scrollbar.set)
         
+        # Paging and search controls
+        paging_frame = tk.Frame(scores_content, bg=self.colors['bg_card'])
+        paging_frame.pack(fill=tk.X, pady=(8, 0))
+        
+        tk.Button(paging_frame, text="◀ Prev", font=('Arial', 9, 'bold'),
+                  command=lambda: self.hall_of_fame.show_page(self.hall_of_fame.page - 1),
+                  cursor='hand2').pack(side=tk.LEFT)
+        page_label = tk.Label(paging_frame, text="Page 1/1",
+                              font=('Arial', 9, 'bold'),
+                              fg=self.colors['text_dark'],
+                              bg=self.colors['bg_card'])
+        page_label.pack(side=tk.LEFT, padx=8)
+        tk.Button(paging_frame, text="Next ▶", font=('Arial', 9, 'bold'),
+                  command=lambda: self.hall_of_fame.show_page(self.hall_of_fame.page + 1),
+                  cursor='hand2').pack(side=tk.LEFT)
+        
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(paging_frame, textvariable=self.search_var,
+                                font=('Arial', 10), width=14,
+                                relief='raised', borderwidth=2, bg='white')
+        search_entry.pack(side=tk.RIGHT)
+        search_entry.bind('<Return>', lambda e: self.hall_of_fame.apply_search(self.search_var.get()))
+        tk.Label(paging_frame, text="🔍 Range:",
+                 font=('Arial', 9, 'bold'),
+                 fg=self.colors['text_dark'],
+                 bg=self.colors['bg_card']).pack(side=tk.RIGHT, padx=(0, 5))
+        
+        self.hall_of_fame = HallOfFameView(self, self.scores_text, page_label)
+        
         # Clear scores button
         clear_button = tk.Button(scores_content,
                                 text="🗑️ Clear All Records",
@@ -296,29 +727,27 @@ class NumberGuessingGame:
                                 cursor='hand2')
         clear_button.pack(pady=(10, 0))
         
-        self.update_all_displays()
+        if self.profiles is not None:
+            tk.Button(scores_content,
+                      text="🌍 Leaderboard",
+                      font=('Arial', 10, 'bold'),
+                      bg=self.colors['accent_blue'],
+                      fg=self.colors['text_light'],
+                      relief='raised',
+                      borderwidth=2,
+                      padx=15, pady=5,
+                      command=self.show_leaderboard,
+                      cursor='hand2').pack(pady=(5, 0))
+        
+        self.panels_ready = True
+        self.hall_of_fame.reload()
+        self.update_stats_display()
     
     def create_gradient(self, canvas):
-        # Simple gradient effect
-        height = 800
-        for i in range(height):
-            color = self.interpolate_color('#2C3E50', '#34495E', i / height)
-            canvas.create_line(0, i, 700, i, fill=color, width=1)
-    
-    def interpolate_color(self, color1, color2, factor):
-        # Simple color interpolation
-        def hex_to_rgb(hex_color):
-            hex_color = hex_color.lstrip('#')
-            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        
-        def rgb_to_hex(rgb):
-            return '#%02x%02x%02x' % rgb
-        
-        rgb1 = hex_to_rgb(color1)
-        rgb2 = hex_to_rgb(color2)
-        
-        rgb = tuple(int(rgb1[i] + factor * (rgb2[i] - rgb1[i])) for i in range(3))
-        return rgb_to_hex(rgb)
+        # Gradient background drawn as a single cached image instead of 800 line items
+        image = gradient_image(self.root, '#2C3E50', '#34495E', 700, 800)
+        canvas.create_image(0, 0, image=image, anchor='nw')
+        canvas.gradient_image = image  # Tk drops images that Python no longer references
     
     def create_card(self, parent, title, accent_color):
         # Card container
@@ -355,7 +784,7 @@ class NumberGuessingGame:
         entry = tk.Entry(parent,
                         textvariable=textvariable,
                         font=('Arial', 11),
-                        width=12,
+                        width=22,
                         relief='raised',
                         borderwidth=2,
                         bg='white')
@@ -375,302 +804,500 @@ class NumberGuessingGame:
         value_label.pack()
         
         # Store reference for updating
-        setattr(self, f"stat_{label.lower().replace(' ', '_')}", value_label)
+        setattr(self, f"stat_{label.lower().replace(' ', '_').replace('-', '_')}", value_label)
         
         # Configure grid weights
         parent.grid_columnconfigure(col, weight=1)
     
     def show_setup_frame(self):
-        self.game_active = False
-        self.guess_button.config(state="disabled", bg='gray')
-        self.guess_entry.config(state="disabled")
-        self.start_button.config(state="normal", bg=self.colors['accent_green'])
+        self.view.configure(self.guess_button, state="disabled", bg='gray')
+        self.view.configure(self.guess_entry, state="disabled")
+        self.view.configure(self.start_button, state="normal", bg=self.colors['accent_green'])
     
     def start_game(self):
+        mode, time_limit = GAME_MODES.get(self.mode_var.get(), (MODE_CLASSIC, None))
         try:
-            # Validate inputs
-            min_val = int(self.min_var.get())
-            max_val = int(self.max_var.get())
-            max_attempts = int(self.attempts_var.get())
-            
-            if min_val >= max_val:
-                messagebox.showerror("Invalid Range", "Minimum must be less than maximum!")
-                return
-            
-            if max_attempts < 1:
-                messagebox.showerror("Invalid Attempts", "Maximum attempts must be at least 1!")
-                return
-            
-            # Set game parameters
-            self.min_range = min_val
-            self.max_range = max_val
-            self.max_attempts = max_attempts
-            self.attempts_left = max_attempts
-            self.current_attempts = 0
-            
-            # Generate secret number
-            self.secret_number = random.randint(self.min_range, self.max_range)
-            
-            # Update UI
-            self.game_active = True
-            self.guess_button.config(state="normal", bg=self.colors['accent_blue'])
-            self.guess_entry.config(state="normal")
-            self.start_button.config(state="disabled", bg='gray')
-            
-            # Clear previous game data
-            self.guess_var.set("")
-            self.feedback_label.config(text="", fg=self.colors['text_dark'])
-            
-            # Update info
-            range_text = f"🎯 Guess a number between {self.min_range} and {self.max_range}"
-            self.info_label.config(text=range_text, fg=self.colors['text_dark'])
-            self.update_attempts_display()
-            
-            # Focus on guess entry
-            self.guess_entry.focus()
-            
-        except ValueError:
-            messagebox.showerror("Invalid Input", "Please enter valid numbers for all fields!")
+            # Validate inputs and generate the secret number
+            self.session = self.engine.new_session(self.min_var.get(),
+                                                   self.max_var.get(),
+                                                   self.attempts_var.get(),
+                                                   rng=GENERATORS['secrets' if self.secure_var.get() else 'random'],
+                                                   mode=mode, time_limit=time_limit)
+        except SettingsError as e:
+            messagebox.showerror(e.title, e.message)
+            return
+        
+        # Update UI
+        self.view.configure(self.guess_button, state="normal", bg=self.colors['accent_blue'])
+        self.view.configure(self.guess_entry, state="normal")
+        self.view.configure(self.start_button, state="disabled", bg='gray')
+        
+        # Clear previous game data
+        self.guess_var.set("")
+        self.view.configure(self.feedback_label, text="", fg=self.colors['text_dark'])
+        
+        # Update info
+        name, emoji = self.session.hints.difficulty
+        range_text = (f"🎯 Guess a number between {self.session.min_range} and {self.session.max_range}"
+                      f" in {self.session.max_attempts} attempts ({emoji} {name})")
+        self.view.configure(self.info_label, text=range_text, fg=self.colors['text_dark'])
+        self.update_attempts_display()
+        self.view.configure(self.timer_label, text="")
+        self.stop_timer()
+        if self.session.mode != MODE_CLASSIC:
+            self.tick_timer(self.session)
+        
+        # Focus on guess entry
+        self.guess_entry.focus()
+    
+    def tick_timer(self, session):
+        """Redraw the clock and schedule the next tick on the session's clock"""
+        self._timer_job = None
+        if session is not self.session or not session.active:
+            return
+        time_left = session.time_left_ns()
+        if time_left is None:
+            self.view.configure(self.timer_label, text=f"⏱️ {session.elapsed_ns() / 1e9:.1f}s")
+        elif time_left == 0:
+            self.view.configure(self.feedback_label, text=session.expire().message, fg=self.tone_colors['danger'])
+            self.view.configure(self.timer_label, text="⏰ 0.0s")
+            self.engine.record_result(session)
+            self.end_game((session.min_range, session.max_range))
+            return
+        else:
+            self.view.configure(self.timer_label, text=f"⏰ {time_left / 1e9:.1f}s")
+        # Sleep to the next tick boundary rather than a fixed interval, so
+        # slow callbacks don't accumulate into drift
+        elapsed_ms = session.elapsed_ns() // 1_000_000
+        delay = TIMER_TICK_MS - elapsed_ms % TIMER_TICK_MS
+        if time_left is not None:
+            delay = max(1, min(delay, -(-time_left // 1_000_000)))
+        self._timer_job = self.root.after(delay, lambda: self.tick_timer(session))
+    
+    def stop_timer(self):
+        if self._timer_job is not None:
+            self.root.after_cancel(self._timer_job)
+            self._timer_job = None
     
+    @metrics.timed('make_guess')
     def make_guess(self):
-        if not self.game_active:
+        if self.session is None or not self.session.active:
             return
         
-        try:
-            guess = int(self.guess_var.get())
-            
-            if guess < self.min_range or guess > self.max_range:
-                self.feedback_label.config(
-                    text=f"⚠️ Please guess between {self.min_range} and {self.max_range}!",
-                    fg=self.colors['warning'])
-                return
-            
-            self.current_attempts += 1
-            self.attempts_left -= 1
-            
-            if guess == self.secret_number:
-                # Winner!
-                self.feedback_label.config(
-                    text=f"🎉 AMAZING! You guessed it in {self.current_attempts} attempts! 🏆",
-                    fg=self.colors['success'])
-                self.save_game_result(True, self.current_attempts)
-                self.end_game()
-                
-            elif self.attempts_left == 0:
-                # Out of attempts
-                self.feedback_label.config(
-                    text=f"😞 Game Over! The number was {self.secret_number}. Better luck next time!",
-                    fg=self.colors['danger'])
-                self.save_game_result(False, self.current_attempts)
-                self.end_game()
-                
-            else:
-                # Give hint with more personality
-                if guess < self.secret_number:
-                    diff = self.secret_number - guess
-                    if diff > 20:
-                        hint = "📈 WAY too low! Think much higher! 🚀"
-                    elif diff > 10:
-                        hint = "📈 Too low! Go higher! ⬆️"
-                    else:
-                        hint = "📈 Close, but still too low! Just a bit higher! 😊"
-                else:
-                    diff = guess - self.secret_number
-                    if diff > 20:
-                        hint = "📉 WAY too high! Think much lower! 🎈"
-                    elif diff > 10:
-                        hint = "📉 Too high! Go lower! ⬇️"
-                    else:
-                        hint = "📉 Close, but still too high! Just a bit lower! 😊"
-                
-                self.feedback_label.config(text=hint, fg=self.colors['accent_blue'])
-                self.update_attempts_display()
-            
-            # Clear guess entry
-            self.guess_var.set("")
-            
-        except ValueError:
-            self.feedback_label.config(text="🤔 Please enter a valid number!", fg=self.colors['warning'])
+        result = self.session.guess(self.guess_var.get())
+        self.view.configure(self.feedback_label, text=result.message, fg=self.tone_colors[result.tone])
+        
+        if not result.counted:
+            return
+        
+        if result.finished:
+            if self.session.mode != MODE_CLASSIC:
+                self.view.configure(self.timer_label, text=f"⏱️ {self.session.elapsed_ns() / 1e9:.2f}s")
+            self.engine.record_result(self.session)
+            self.end_game((self.session.min_range, self.session.max_range))
+        else:
+            self.update_attempts_display()
+        
+        # Clear guess entry
+        self.guess_var.set("")
     
-    def end_game(self):
-        self.game_active = False
-        self.guess_button.config(state="disabled", bg='gray')
-        self.guess_entry.config(state="disabled")
-        self.start_button.config(state="normal", bg=self.colors['accent_green'])
-        self.update_all_displays()
+    def end_game(self, number_range=None):
+        self.stop_timer()
+        self.view.configure(self.guess_button, state="disabled", bg='gray')
+        self.view.configure(self.guess_entry, state="disabled")
+        self.view.configure(self.start_button, state="normal", bg=self.colors['accent_green'])
+        self.update_all_displays(number_range)
     
     def update_attempts_display(self):
-        attempts_text = f"💪 Attempts: {self.current_attempts} | Remaining: {self.attempts_left}"
-        self.attempts_label.config(text=attempts_text)
+        session = self.session
+        attempts_text = f"💪 Attempts: {session.current_attempts} | Remaining: {session.attempts_left}"
+        self.view.configure(self.attempts_label, text=attempts_text)
         
         # Update progress bar
-        progress = ((self.max_attempts - self.attempts_left) / self.max_attempts) * 100
-        self.progress_var.set(progress)
-    
-    def save_game_result(self, won, attempts):
-        # Save to game history
-        game_record = {
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'range': f"{self.min_range}-{self.max_range}",
-            'max_attempts': self.max_attempts,
-            'attempts_used': attempts,
-            'won': won,
-            'secret_number': self.secret_number
-        }
-        self.game_history.append(game_record)
-        
-        # Save best score if won
-        if won:
-            range_key = f"{self.min_range}-{self.max_range}"
-            attempts_key = f"{self.max_attempts}_attempts"
-            
-            if range_key not in self.best_scores:
-                self.best_scores[range_key] = {}
-            
-            if attempts_key not in self.best_scores[range_key]:
-                self.best_scores[range_key][attempts_key] = attempts
-            else:
-                if attempts < self.best_scores[range_key][attempts_key]:
-                    self.best_scores[range_key][attempts_key] = attempts
-        
-        self.save_data()
+        progress = ((session.max_attempts - session.attempts_left) / session.max_attempts) * 100
+        self.view.set_value(self.progress_var, progress)
     
-    def update_all_displays(self):
+    @metrics.timed('redraw', "Time spent refreshing the stats and Hall of Fame panels")
+    def update_all_displays(self, number_range=None):
+        if not self.panels_ready:
+            return
         self.update_stats_display()
-        self.update_scores_display()
+        self.update_scores_display(number_range)
     
+    @metrics.timed('update_stats_display')
     def update_stats_display(self):
-        if not self.game_history:
-            return
-        
-        total_games = len(self.game_history)
-        won_games = sum(1 for game in self.game_history if game['won'])
-        win_rate = (won_games / total_games * 100) if total_games > 0 else 0
-        
-        # Best score across all games
-        best_score = min((game['attempts_used'] for game in self.game_history if game['won']), default=None)
-        
-        # Average attempts for won games
-        won_attempts = [game['attempts_used'] for game in self.game_history if game['won']]
-        avg_attempts = sum(won_attempts) / len(won_attempts) if won_attempts else 0
-        
-        # Current streak
-        current_streak = 0
-        for game in reversed(self.game_history):
-            if game['won']:
-                current_streak += 1
-            else:
-                break
+        stats = self.engine.stats
+        
+        # Running counters - no history scan needed
+        total_games = stats.total
+        won_games = stats.wins
+        win_rate = stats.win_rate
+        best_score = stats.best_attempts
+        avg_attempts = stats.avg_attempts
+        current_streak = stats.current_streak
+        # Per-day buckets - at most 7 slot reads
+        games_today = stats.games_today
+        recent_win_rate = stats.recent_win_rate(7)
         
         # Update stat boxes
-        self.stat_games_played.config(text=str(total_games))
-        self.stat_games_won.config(text=str(won_games))
-        self.stat_win_rate.config(text=f"{win_rate:.1f}%")
-        self.stat_best_score.config(text=str(best_score) if best_score else "N/A")
-        self.stat_avg_attempts.config(text=f"{avg_attempts:.1f}" if avg_attempts > 0 else "N/A")
-        self.stat_current_streak.config(text=str(current_streak))
-    
-    def update_scores_display(self):
-        self.scores_text.delete(1.0, tk.END)
-        
-        if not self.best_scores:
-            self.scores_text.insert(tk.END, "🏆 No records yet! Play some games to see your achievements!\n\n")
-            self.scores_text.insert(tk.END, "🎯 Tips:\n")
-            self.scores_text.insert(tk.END, "• Try different difficulty levels\n")
-            self.scores_text.insert(tk.END, "• Challenge yourself with larger ranges\n")
-            self.scores_text.insert(tk.END, "• See how few attempts you can win in!\n")
-            return
-        
-        self.scores_text.insert(tk.END, "🏅 HALL OF FAME - Best Scores by Difficulty 🏅\n")
-        self.scores_text.insert(tk.END, "=" * 50 + "\n\n")
-        
-        for range_key, attempts_dict in sorted(self.best_scores.items()):
-            range_parts = range_key.split('-')
-            range_size = int(range_parts[1]) - int(range_parts[0]) + 1
-            
-            # Determine difficulty emoji
-            if range_size <= 20:
-                difficulty_emoji = "🟢 EASY"
-            elif range_size <= 50:
-                difficulty_emoji = "🟡 MEDIUM"
-            elif range_size <= 100:
-                difficulty_emoji = "🟠 HARD"
-            else:
-                difficulty_emoji = "🔴 EXPERT"
-            
-            self.scores_text.insert(tk.END, f"{difficulty_emoji} Range {range_parts[0]} - {range_parts[1]} ({range_size} numbers)\n")
-            self.scores_text.insert(tk.END, "-" * 40 + "\n")
-            
-            for attempts_key, best_score in sorted(attempts_dict.items()):
-                max_attempts = attempts_key.replace('_attempts', '')
-                
-                # Calculate efficiency
-                efficiency = (best_score / int(max_attempts)) * 100
-                if efficiency <= 30:
-                    efficiency_emoji = "⭐⭐⭐"
-                elif efficiency <= 50:
-                    efficiency_emoji = "⭐⭐"
-                else:
-                    efficiency_emoji = "⭐"
-                
-                score_text = f"  🎯 {max_attempts} max attempts: {best_score} attempts {efficiency_emoji}\n"
-                self.scores_text.insert(tk.END, score_text)
-            
-            self.scores_text.insert(tk.END, "\n")
-        
-        # Recent games summary
-        if self.game_history:
-            self.scores_text.insert(tk.END, "\n📊 RECENT ACTIVITY\n")
-            self.scores_text.insert(tk.END, "=" * 20 + "\n")
-            
-            recent_games = self.game_history[-5:] if len(self.game_history) >= 5 else self.game_history
-            for game in reversed(recent_games):
-                status = "🏆 WON" if game['won'] else "❌ LOST"
-                date = game['date'].split(' ')[0]  # Just the date part
-                self.scores_text.insert(tk.END, f"{status} | {game['range']} | {game['attempts_used']} attempts | {date}\n")
+        self.view.configure(self.stat_games_played, text=str(total_games))
+        self.view.configure(self.stat_games_won, text=str(won_games))
+        self.view.configure(self.stat_win_rate, text=f"{win_rate:.1f}%")
+        self.view.configure(self.stat_best_score, text=str(best_score) if best_score else "N/A")
+        self.view.configure(self.stat_avg_attempts, text=f"{avg_attempts:.1f}" if avg_attempts > 0 else "N/A")
+        self.view.configure(self.stat_current_streak, text=str(current_streak))
+        self.view.configure(self.stat_longest_streak, text=str(stats.longest_streak))
+        self.view.configure(self.stat_games_today, text=str(games_today))
+        self.view.configure(self.stat_7_day_win_rate, text=f"{recent_win_rate:.1f}%" if recent_win_rate is not None else "N/A")
+    
+    @metrics.timed('update_scores_display')
+    def update_scores_display(self, number_range=None):
+        """Refresh the Hall of Fame; with a (min, max) range only that entry is redrawn"""
+        if number_range is None:
+            self.hall_of_fame.render()
+        else:
+            self.hall_of_fame.update_range(number_range)
     
     def clear_scores(self):
         """Clear all saved scores and game history"""
         if messagebox.askyesno("Clear Records", "Are you sure you want to clear all records? This cannot be undone!"):
-            self.best_scores = {}
-            self.game_history = []
-            self.save_data()
-            self.update_all_displays()
+            self.engine.clear()
+            if self.profiles is not None:
+                self.profiles.reset_player(self.player)
+            self.hall_of_fame.reload()
+            self.update_stats_display()
             messagebox.showinfo("Cleared", "All records have been cleared!")
     
-    def load_best_scores(self):
-        """Load best scores from JSON file"""
-        try:
-            if os.path.exists("best_scores.json"):
-                with open("best_scores.json", "r") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading best scores: {e}")
-        return {}
-    
-    def load_game_history(self):
-        """Load game history from JSON file"""
+    def switch_player(self):
+        """Load the chosen (or newly typed) player's records in the background"""
         try:
-            if os.path.exists("game_history.json"):
-                with open("game_history.json", "r") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading game history: {e}")
-        return []
-    
-    def save_data(self):
-        """Save both best scores and game history to JSON files"""
-        try:
-            with open("best_scores.json", "w") as f:
-                json.dump(self.best_scores, f, indent=2)
-            with open("game_history.json", "w") as f:
-                json.dump(self.game_history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving data: {e}")
-            messagebox.showerror("Save Error", f"Could not save game data: {e}")
-
-def main():
+            player = self.profiles.check_player(self.player_var.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Player", str(e))
+            self.player_var.set(self.player)
+            return
+        if player == self.player or (self._loader is not None and self._loader.is_alive()):
+            return
+        if self.session is not None and self.session.active:
+            messagebox.showerror("Game In Progress", "Finish the current game before switching players!")
+            self.player_var.set(self.player)
+            return
+        
+        self.view.configure(self.start_button, state="disabled", bg='gray')
+        self.view.configure(self.info_label, text=f"⏳ Loading {player}'s records...")
+        self.start_loader(self.profiles.get, player)
+        self.root.after(20, lambda: self.poll_player(player))
+    
+    def poll_player(self, player):
+        if self._loader.is_alive():
+            self.root.after(20, lambda: self.poll_player(player))
+            return
+        self.view.configure(self.start_button, state="normal", bg=self.colors['accent_green'])
+        if self._load_error is not None:
+            messagebox.showerror("Load Error", f"Could not load {player}'s records: {self._load_error}")
+            self.player_var.set(self.player)
+            self.view.configure(self.info_label,
+                                text=f"🎲 Still playing as {self.player}. Click 'START NEW GAME' to begin!")
+            return
+        self.player = player
+        self.engine = self.profiles.get(player)
+        self.player_box.config(values=self.profiles.players())
+        self.hall_of_fame.reload()
+        self.update_stats_display()
+        self.view.configure(self.info_label, text=f"🎲 Welcome, {player}! Click 'START NEW GAME' to begin!")
+    
+    def show_leaderboard(self):
+        window = tk.Toplevel(self.root)
+        window.title("Leaderboard")
+        text = tk.Text(window, width=60, height=20, font=('Arial', 10), wrap=tk.WORD,
+                       bg=self.colors['bg_card'], fg=self.colors['text_dark'])
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert(tk.END, self.profiles.leaderboard.summary())
+        text.config(state='disabled')
+    
+    def poll_save_errors(self):
+        """Show errors reported by the background writer (Tk is main-thread only)"""
+        if self.save_errors:
+            errors = []
+            while self.save_errors:
+                errors.append(self.save_errors.popleft())
+            self.show_save_error(errors[-1] if len(errors) == 1
+                                 else f"{errors[-1]} (and {len(errors) - 1} more)")
+        self.root.after(SAVE_ERROR_POLL_MS, self.poll_save_errors)
+    
+    def show_save_error(self, error):
+        messagebox.showerror("Save Error", f"Could not save game data: {error}")
+    
+    def export_metrics(self):
+        self.metrics_exporter.export()
+        self.root.after(METRICS_EXPORT_MS, self.export_metrics)
+    
+    def show_diagnostics(self):
+        """Live view of the hot-path metrics (starts collecting if it was off)"""
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.lift()
+            return
+        metrics.enable()
+        self.diagnostics = tk.Toplevel(self.root)
+        self.diagnostics.title("Diagnostics")
+        text = tk.Text(self.diagnostics, width=100, height=16, font=('Courier', 10),
+                       bg=self.colors['bg_secondary'], fg=self.colors['text_light'])
+        text.pack(fill=tk.BOTH, expand=True)
+        self.refresh_diagnostics(text)
+    
+    def refresh_diagnostics(self, text):
+        if not self.diagnostics.winfo_exists():
+            return
+        text.config(state='normal')
+        text.delete('1.0', tk.END)
+        text.insert(tk.END, metrics.summary())
+        text.config(state='disabled')
+        self.root.after(DIAGNOSTICS_REFRESH_MS, lambda: self.refresh_diagnostics(text))
+    
+    def close(self):
+        """Write everything still queued before the window goes away"""
+        self.stop_timer()
+        if self._loader is not None:
+            self._loader.join()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.export()
+        if self.profiles is not None:
+            self.profiles.close()
+        else:
+            self.engine.close()
+
+def backend_config(args):
+    """game_config.json settings with the --backend option applied"""
+    config = load_config()
+    if args.backend:
+        config['backend'] = args.backend
+    if args.hints:
+        config['hint_profile'] = args.hints
+    try:
+        get_profile(config.get('hint_profile'))
+    except ValueError as e:
+        print(f"Error in hint_profile, using the default: {e}")
+        config['hint_profile'] = DEFAULT_PROFILE.name
+    return config
+
+
+def serve(args):
+    """Run the multi-session TCP game server"""
+    from game_server import run_server
+    config = backend_config(args)
+    # Batch fsyncs, commits and stats snapshots harder than the GUI does
+    backend = open_backend(config, sync_every=1000, stats_save_interval=5.0, write_delay=1.0)
+    engine = GameEngine(backend, rng=GENERATORS[args.generator], profile=config['hint_profile']).load()
+    run_server(engine, args.host, args.port, metrics_path=args.metrics)
+
+
+def load_test(args):
+    """Hammer a running game server with the local load generator"""
+    from load_client import run_load_client
+    run_load_client(args.host, args.port, args.active, args.idle, args.duration, args.pipeline)
+
+
+# One setting per Hall of Fame difficulty bucket that fits the NumPy simulator
+DEFAULT_SIMULATIONS = ['1:20:5', '1:50:6', '1:100:7', '1:1000:10', '1:1e6:20', '1:1e18:60']
+
+
+def simulate(args):
+    """Play batches of solver strategies against the hint feedback"""
+    from simulator import STRATEGIES, parse_config, run_simulations
+    strategies = list(STRATEGIES) if args.strategy == 'all' else [args.strategy]
+    configs = [parse_config(config) for config in args.config or DEFAULT_SIMULATIONS]
+    run_simulations(configs, strategies, args.games, args.seed,
+                    vectorized=not args.reference, json_path=args.json,
+                    profile=backend_config(args)['hint_profile'])
+
+
+def run_tournament(args):
+    """Play bot strategies against each other across worker processes"""
+    from simulator import STRATEGIES, parse_config
+    from tournament import run_tournament as play
+    strategies = list(STRATEGIES) if args.strategy == 'all' else [args.strategy]
+    configs = [parse_config(config) for config in args.config or DEFAULT_SIMULATIONS]
+    config = backend_config(args)
+    backend = None
+    if not args.no_save:
+        os.makedirs(args.out, exist_ok=True)
+        # One bulk write at the end, so per-game fsync batching doesn't matter
+        backend = open_backend(config, args.out, sync_every=1000, stats_save_interval=5.0)
+    play(strategies, configs, args.matches, args.seed, args.workers, backend,
+         profile=config['hint_profile'])
+
+
+def show_stats(args):
+    """Stream a history file into the statistics counters and print them"""
+    from stats import StatsAggregator
+    from storage import HistoryLog, JsonArrayReader
+    if args.file.endswith('.jsonl'):
+        records = HistoryLog(args.file, legacy_path=None).iter_records()
+        reader = None
+    else:
+        records = reader = JsonArrayReader(args.file, use_mmap=args.mmap)
+    print(StatsAggregator(None).rebuild(records).summary())
+    if reader is not None and reader.damaged:
+        print(f"⚠️ {reader.damaged} damaged entries skipped, {reader.records} records recovered")
+
+
+def export_history(args):
+    """Append new games to the columnar analytics export"""
+    from analytics import run_export
+    config = backend_config(args)
+    if config['backend'] == 'sqlite':
+        run_export(config['database'], args.out, 'sqlite', args.format, args.full)
+    else:
+        run_export(args.file, args.out, 'jsonl', args.format, args.full)
+
+
+def analyze_history(args):
+    """Print vectorized aggregations over a columnar export"""
+    from analytics import run_analysis
+    run_analysis(args.export, json_path=args.json)
+
+
+def replay_games(args):
+    """Re-run every seeded game and check it reproduces the stored outcome"""
+    from replay import run_replay
+    config = backend_config(args)
+    if config['backend'] == 'sqlite':
+        report = run_replay(config['database'], 'sqlite', args.workers)
+    else:
+        report = run_replay(args.file, 'jsonl', args.workers)
+    if report is None or not report.ok:
+        sys.exit(1)
+
+
+def merge_histories(args):
+    """Import other machines' histories into this one, skipping games it already has"""
+    from merge import run_merge
+    report = run_merge(args.files, backend_config(args), args.dir, args.dry_run)
+    if report is None:
+        sys.exit(1)
+
+
+def shared_options(subcommand=False):
+    """Parent parser for the options taken both before and after a subcommand.
+
+    The subcommand copies have no defaults, so they only replace a value given
+    before the subcommand when they are given again after it.
+    """
+    parser = argparse.ArgumentParser(add_help=False,
+                                     argument_default=argparse.SUPPRESS if subcommand else None)
+    parser.add_argument('--backend', choices=['json', 'sqlite'],
+                        help="storage backend (default: 'backend' in game_config.json, else json)")
+    parser.add_argument('--hints', choices=list(PROFILES),
+                        help="hint tier profile (default: 'hint_profile' in game_config.json, else proportional)")
+    parser.add_argument('--generator', choices=list(GENERATORS),
+                        default=argparse.SUPPRESS if subcommand else 'random',
+                        help="secret number generator ('secrets' uses the OS's CSPRNG)")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="collect hot-path metrics and write them to PATH in Prometheus text format")
+    return parser
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="🎯 Number Guessing Game", parents=[shared_options()])
+    subparsers = parser.add_subparsers(dest='command')
+    shared = [shared_options(subcommand=True)]
+    
+    serve_parser = subparsers.add_parser('serve', help="run the line-based TCP game server", parents=shared)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=5050)
+    serve_parser.set_defaults(handler=serve)
+    
+    load_parser = subparsers.add_parser('loadtest', help="load-test a running game server", parents=shared)
+    load_parser.add_argument('--host', default='127.0.0.1')
+    load_parser.add_argument('--port', type=int, default=5050)
+    load_parser.add_argument('--active', type=int, default=100, help="connections playing games")
+    load_parser.add_argument('--idle', type=int, default=0, help="connections held open but silent")
+    load_parser.add_argument('--duration', type=float, default=10.0, help="seconds to run")
+    load_parser.add_argument('--pipeline', type=int, default=0, metavar='DEPTH',
+                             help="send whole games of DEPTH blind guesses per write instead of binary search")
+    load_parser.set_defaults(handler=load_test)
+    
+    stats_parser = subparsers.add_parser('stats', help="stream a history file and print its statistics",
+                                         parents=shared)
+    stats_parser.add_argument('--file', default='game_history.jsonl',
+                              help="a JSON-Lines log or a legacy JSON array file")
+    stats_parser.add_argument('--mmap', action='store_true', help="memory-map JSON array files")
+    stats_parser.set_defaults(handler=show_stats)
+    
+    sim_parser = subparsers.add_parser('simulate', help="simulate solver strategies to calibrate difficulty",
+                                       parents=shared)
+    sim_parser.add_argument('--games', type=int, default=100000, help="games per strategy and setting")
+    sim_parser.add_argument('--strategy', default='all', choices=['all', 'binary', 'random', 'tiers'])
+    sim_parser.add_argument('--config', action='append', metavar='MIN:MAX:ATTEMPTS',
+                            help="setting to simulate (repeatable, default: one per difficulty bucket)")
+    sim_parser.add_argument('--seed', type=int, default=None)
+    sim_parser.add_argument('--reference', action='store_true',
+                            help="play real GameSession objects instead of NumPy batches")
+    sim_parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    sim_parser.set_defaults(handler=simulate, config=None)
+    
+    tour_parser = subparsers.add_parser('tournament', help="bot tournament across a process pool",
+                                        parents=shared)
+    tour_parser.add_argument('--matches', type=int, default=10000, help="matches per strategy and setting")
+    tour_parser.add_argument('--strategy', default='all', choices=['all', 'binary', 'random', 'tiers'])
+    tour_parser.add_argument('--config', action='append', metavar='MIN:MAX:ATTEMPTS',
+                             help="setting to play (repeatable, default: one per difficulty bucket)")
+    tour_parser.add_argument('--seed', type=int, default=None, help="tournament seed (matches are replayable)")
+    tour_parser.add_argument('--workers', type=int, default=None,
+                             help="worker processes (default: one per CPU, 1 plays in-process)")
+    tour_parser.add_argument('--out', default='tournament', help="directory the games are saved to")
+    tour_parser.add_argument('--no-save', action='store_true', help="only print the standings")
+    tour_parser.set_defaults(handler=run_tournament, config=None)
+    
+    export_parser = subparsers.add_parser('export', help="export new games to a columnar analytics file",
+                                          parents=shared)
+    export_parser.add_argument('--file', default='game_history.jsonl', help="JSON-Lines history to export")
+    export_parser.add_argument('--out', default='history_export', help="export directory")
+    export_parser.add_argument('--format', default='auto', choices=['auto', 'parquet', 'npz'],
+                               help="part format (auto: Parquet if pyarrow is installed, else npz)")
+    export_parser.add_argument('--full', action='store_true', help="re-export everything from scratch")
+    export_parser.set_defaults(handler=export_history)
+    
+    analyze_parser = subparsers.add_parser('analyze', help="win rates, attempts, streaks and time of day",
+                                           parents=shared)
+    analyze_parser.add_argument('--export', default='history_export', help="export directory to read")
+    analyze_parser.add_argument('--json', metavar='PATH', help="also write the report as JSON")
+    analyze_parser.set_defaults(handler=analyze_history)
+    
+    replay_parser = subparsers.add_parser('replay', help="replay seeded games to check they reproduce",
+                                          parents=shared)
+    replay_parser.add_argument('--file', default='game_history.jsonl', help="JSON-Lines history to replay")
+    replay_parser.add_argument('--workers', type=int, default=None,
+                               help="worker processes (default: one per CPU, 1 replays in-process)")
+    replay_parser.set_defaults(handler=replay_games)
+    
+    merge_parser = subparsers.add_parser('merge', aliases=['import'],
+                                         help="import histories from other files, dropping duplicate games",
+                                         parents=shared)
+    merge_parser.add_argument('files', nargs='+', metavar='FILE',
+                              help="JSON-Lines logs (.jsonl), SQLite databases (.db) or JSON array files")
+    merge_parser.add_argument('--dir', default=None, help="directory holding the history to merge into")
+    merge_parser.add_argument('--dry-run', action='store_true', help="count what would be added, write nothing")
+    merge_parser.set_defaults(handler=merge_histories)
+    
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print per-phase startup timings")
+    parser.add_argument('--eager', action='store_true',
+                        help="load records before showing the window instead of in the background")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main function to run the game"""
+    args = parse_args(argv)
+    if args.command:
+        args.handler(args)
+        return
+    
+    profiler = StartupProfiler(_IMPORTS_STARTED) if args.profile_startup else None
+    if profiler is not None:
+        profiler.mark("imports")
+    
     root = tk.Tk()
     
     # Center the window on screen
@@ -681,12 +1308,23 @@ def main():
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f"{width}x{height}+{x}+{y}")
     
+    if profiler is not None:
+        profiler.mark("Tk init")
+    
     # Create the game
-    game = NumberGuessingGame(root)
+    game = NumberGuessingGame(root, profiler=profiler, lazy=not args.eager,
+                              profiles=ProfileStore(config=backend_config(args)),
+                              metrics_path=args.metrics, generator=args.generator)
+    
+    if profiler is not None:
+        # Idle tasks only, so the background-load poll can't run before this mark
+        root.update_idletasks()
+        profiler.mark("first paint")
     
     # Handle window closing
     def on_closing():
         if messagebox.askokcancel("Quit", "Do you want to quit the game?"):
+            game.close()
             root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -0,0 +1,156 @@
+"""Difficulty profiles: hint tiers and difficulty labels for a game setting.
+
+A profile decides how far off a wrong guess must be to count as "close",
+"off" or "way off", and which difficulty label a range size gets. What a
+game needs is precomputed once per range size into a HintTable - the tier
+boundaries, the hint strings and the label - and cached on the profile, so a
+guess is one bisect and a tuple index. The GUI, the server, simulations and
+tournaments all read the same tables.
+
+Tier styles:
+  proportional  tiers are percentages of the range (10% / 20% by default),
+                the same split on every board size
+  logarithmic   tiers are percentages of the range's magnitude: with 33 / 67
+                a 1-100 board is "close" within 4 and "off" within 21, a
+                1-10^18 board within about 10^6 and 10^12
+"""
+import bisect
+import math
+from functools import lru_cache
+
+TIER_CLOSE, TIER_NEAR, TIER_FAR = 0, 1, 2
+
+TIERS_PROPORTIONAL = 'proportional'
+TIERS_LOGARITHMIC = 'logarithmic'
+TIER_STYLES = (TIERS_PROPORTIONAL, TIERS_LOGARITHMIC)
+
+# Hint texts indexed by tier; every table shares these tuples
+HINTS_LOW = (
+    "📈 Close, but still too low! Just a bit higher! 😊",
+    "📈 Too low! Go higher! ⬆️",
+    "📈 WAY too low! Think much higher! 🚀",
+)
+
+HINTS_HIGH = (
+    "📉 Close, but still too high! Just a bit lower! 😊",
+    "📉 Too high! Go lower! ⬇️",
+    "📉 WAY too high! Think much lower! 🎈",
+)
+
+# Difficulty buckets by range size: (largest size in bucket, name, emoji)
+DIFFICULTY_BUCKETS = [
+    (20, 'EASY', '🟢'),
+    (50, 'MEDIUM', '🟡'),
+    (100, 'HARD', '🟠'),
+    (10 ** 4, 'EXPERT', '🔴'),
+    (10 ** 9, 'MASTER', '🟣'),
+    (10 ** 18, 'LEGENDARY', '⚫'),
+    (None, 'ASTRONOMICAL', '🌌'),
+]
+
+# Hint tables kept per profile; one per distinct range size played
+TABLE_CACHE = 1024
+
+
+class HintTable:
+    """Everything a session needs to answer guesses on one range size"""
+
+    __slots__ = ('limits', 'low', 'high', 'difficulty')
+
+    def __init__(self, limits, difficulty):
+        self.limits = limits
+        self.low = HINTS_LOW
+        self.high = HINTS_HIGH
+        self.difficulty = difficulty
+
+    def hint(self, guess, secret_number):
+        """(tier, hint text) for a wrong guess"""
+        # Tier i covers distances up to limits[i]; past the last one is TIER_FAR
+        tier = bisect.bisect_left(self.limits, abs(secret_number - guess))
+        return tier, (self.low if guess < secret_number else self.high)[tier]
+
+
+def check_buckets(buckets):
+    """Buckets as (limit, name, emoji) tuples (raises ValueError).
+
+    Limits must ascend, and the last bucket must be a catch-all with a None limit.
+    """
+    try:
+        buckets = [(limit, name, emoji) for limit, name, emoji in buckets]
+    except (TypeError, ValueError):
+        raise ValueError("Difficulty buckets are [largest size, name, emoji] triples")
+    if not buckets or buckets[-1][0] is not None:
+        raise ValueError("The last difficulty bucket needs a null limit to catch every larger range")
+    limits = [limit for limit, _, _ in buckets[:-1]]
+    if not all(type(limit) is int and limit > 0 for limit in limits):
+        raise ValueError("Difficulty bucket limits must be positive whole numbers")
+    if any(low >= high for low, high in zip(limits, limits[1:])):
+        raise ValueError("Difficulty bucket limits must be in ascending order")
+    return buckets
+
+
+class DifficultyProfile:
+    """Tier style and boundaries plus difficulty buckets.
+
+    near and far are percentages: of the range size for proportional tiers,
+    of its magnitude (the exponent) for logarithmic ones.
+    """
+
+    def __init__(self, name, tiers=TIERS_PROPORTIONAL, near=10, far=20, buckets=DIFFICULTY_BUCKETS):
+        if tiers not in TIER_STYLES:
+            raise ValueError(f"Unknown tier style: {tiers!r}")
+        if not all(type(value) is int for value in (near, far)) or not 0 < near < far <= 100:
+            raise ValueError("Hint tiers need whole numbers with 0 < near < far <= 100")
+        self.name = name
+        self.tiers = tiers
+        self.near = near
+        self.far = far
+        self.buckets = check_buckets(buckets)
+        self.bucket_limits = [limit for limit, _, _ in self.buckets[:-1]]
+        self.bucket_names = {name for _, name, _ in self.buckets}
+        self.table = lru_cache(maxsize=TABLE_CACHE)(self.build_table)
+
+    def limits(self, range_size):
+        """Ascending (near, far) distances for a range size"""
+        if self.tiers == TIERS_PROPORTIONAL:
+            near = int(range_size * self.near // 100)
+            far = int(range_size * self.far // 100)
+        else:
+            magnitude = math.log(range_size) if range_size > 1 else 0.0
+            near = int(math.exp(magnitude * self.near / 100))
+            far = int(math.exp(magnitude * self.far / 100))
+        near = max(1, near)
+        return near, max(near + 1, far)
+
+    def difficulty(self, range_size):
+        """(name, emoji) of the difficulty bucket a range size falls into"""
+        _, name, emoji = self.buckets[bisect.bisect_left(self.bucket_limits, range_size)]
+        return name, emoji
+
+    def build_table(self, range_size):
+        return HintTable(self.limits(range_size), self.difficulty(range_size))
+
+
+PROFILES = {
+    TIERS_PROPORTIONAL: DifficultyProfile(TIERS_PROPORTIONAL),
+    TIERS_LOGARITHMIC: DifficultyProfile(TIERS_LOGARITHMIC, TIERS_LOGARITHMIC, near=33, far=67),
+}
+
+DEFAULT_PROFILE = PROFILES[TIERS_PROPORTIONAL]
+
+
+def get_profile(setting=None):
+    """A profile from a name in PROFILES or a dict of DifficultyProfile arguments (raises ValueError)"""
+    if setting is None:
+        return DEFAULT_PROFILE
+    if isinstance(setting, DifficultyProfile):
+        return setting
+    if isinstance(setting, dict):
+        try:
+            return DifficultyProfile(**{'name': 'custom', **setting})
+        except TypeError as e:
+            raise ValueError(f"Bad hint profile: {e}")
+    try:
+        return PROFILES[setting]
+    except KeyError:
+        raise ValueError(f"Unknown hint profile: {setting!r} (choose from {', '.join(PROFILES)})")
@@ -0,0 +1,405 @@
+"""Game rules and bookkeeping, free of any Tkinter dependency.
+
+The GUI in code.py is a thin view over this module; servers, simulators and
+batch tools drive GameSession/GameEngine directly.
+"""
+import math
+import random
+import re
+import secrets
+import time
+from datetime import datetime
+
+import metrics
+from backends import JsonBackend
+from difficulty import DEFAULT_PROFILE, get_profile
+from scores import parse_range_key
+
+GUESSES = metrics.counter('guesses_total', "Guesses submitted to any session")
+GAMES = metrics.counter('games_total', "Finished games recorded")
+WINS = metrics.counter('wins_total', "Finished games that were won")
+
+
+# Secret generators: None gives every session its own random.Random(seed), so
+# the game can be replayed from its record; 'secrets' uses the OS's CSPRNG and
+# can't be replayed
+SECURE_RNG = secrets.SystemRandom()
+GENERATORS = {'random': None, 'secrets': SECURE_RNG}
+
+# Session seeds are non-negative and fit in a signed 64-bit column
+SEED_BITS = 63
+
+# Setup fields accept numbers up to 10^MAX_DIGITS (plenty, and keeps int() cheap)
+MAX_DIGITS = 100
+MAX_NUMBER = 10 ** MAX_DIGITS
+
+# Plain integers with optional _ or , separators, or "1e18", "10^18" and "10**18"
+_NUMBER = re.compile(r'^([+-]?\d[\d_,]*)(?:(e|\^|\*\*)(\d{1,3}))?$', re.IGNORECASE)
+
+AUTO_ATTEMPTS = ('', 'auto')
+
+# Game modes: classic has no clock; timed games are lost when time_limit runs
+# out; speed-runs have no limit but rank wins by time
+MODE_CLASSIC, MODE_TIMED, MODE_SPEEDRUN = 'classic', 'timed', 'speedrun'
+MODES = (MODE_CLASSIC, MODE_TIMED, MODE_SPEEDRUN)
+
+
+class SettingsError(ValueError):
+    """Raised when a game cannot be started with the given settings"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+class GuessResult:
+    """Outcome of a single guess.
+
+    status is one of 'invalid', 'out_of_range', 'low', 'high', 'won' or 'lost';
+    tone tells a view how to colour the message and tier is the hint tier
+    (difficulty.TIER_CLOSE/TIER_NEAR/TIER_FAR) of a 'low' or 'high' answer.
+    """
+
+    __slots__ = ('status', 'message', 'tone', 'tier')
+
+    def __init__(self, status, message, tone, tier=None):
+        self.status = status
+        self.message = message
+        self.tone = tone
+        self.tier = tier
+
+    @property
+    def finished(self):
+        return self.status in ('won', 'lost')
+
+    @property
+    def counted(self):
+        """True when the guess used up an attempt"""
+        return self.status in ('low', 'high', 'won', 'lost')
+
+
+def parse_number(value):
+    """int from an int or a string such as '1000', '1_000_000', '1e18' or '10^18' (raises ValueError)"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, bytes):
+        value = value.decode('ascii', 'replace')
+    match = _NUMBER.match(''.join(str(value).split()))
+    if not match:
+        raise ValueError(f"Not a number: {value!r}")
+    mantissa, operator, exponent = match.groups()
+    if len(mantissa) > 2 * MAX_DIGITS:
+        raise ValueError("Number too long")
+    number = int(mantissa.replace('_', '').replace(',', ''))
+    if operator is not None:
+        exponent = int(exponent)
+        if operator.lower() == 'e':
+            if exponent > MAX_DIGITS:
+                raise ValueError("Number too long")
+            number *= 10 ** exponent
+        else:
+            if number and exponent * math.log10(abs(number)) > MAX_DIGITS:
+                raise ValueError("Number too long")
+            number **= exponent
+    if abs(number) > MAX_NUMBER:
+        raise ValueError("Number too long")
+    return number
+
+
+def default_attempts(min_range, max_range):
+    """floor(log2(range size)) + 1: the most guesses a binary search needs, computed exactly for any size"""
+    return (max_range - min_range + 1).bit_length()
+
+
+def parse_settings(min_value, max_value, attempts_value=None):
+    """Validate raw setup values (strings or ints) and return them as ints.
+
+    A blank or 'auto' attempts value means default_attempts() for the range.
+    """
+    try:
+        min_val = parse_number(min_value)
+        max_val = parse_number(max_value)
+    except (TypeError, ValueError):
+        raise SettingsError("Invalid Input",
+                            f"Please enter valid numbers (up to 10^{MAX_DIGITS}) for all fields!")
+
+    if min_val >= max_val:
+        raise SettingsError("Invalid Range", "Minimum must be less than maximum!")
+
+    if attempts_value is None or str(attempts_value).strip().lower() in AUTO_ATTEMPTS:
+        return min_val, max_val, default_attempts(min_val, max_val)
+    try:
+        max_attempts = parse_number(attempts_value)
+    except (TypeError, ValueError):
+        raise SettingsError("Invalid Input", "Please enter valid numbers for all fields!")
+
+    if max_attempts < 1:
+        raise SettingsError("Invalid Attempts", "Maximum attempts must be at least 1!")
+
+    return min_val, max_val, max_attempts
+
+
+class GameSession:
+    """State of one game in progress.
+
+    The clock (time.perf_counter_ns by default) starts when the session is
+    created; every counted guess stores its response time in nanoseconds.
+    Bounds may be arbitrarily large ints: a guess is a few comparisons and a
+    subtraction, whatever the range size. Without a secret_number or rng the
+    secret comes from random.Random(seed), and seed plus the counted guesses
+    are enough to replay the game (see replay.py).
+    """
+
+    __slots__ = ('min_range', 'max_range', 'max_attempts', 'secret_number',
+                 'attempts_left', 'current_attempts', 'active', 'won', 'hints', 'hint_limits',
+                 'mode', 'time_limit_ns', 'clock', 'started_ns', 'last_guess_ns',
+                 'guess_ns', 'finished_ns', 'seed', 'guesses')
+
+    def __init__(self, min_range, max_range, max_attempts, secret_number=None, rng=None,
+                 mode=MODE_CLASSIC, time_limit=None, clock=time.perf_counter_ns, seed=None,
+                 profile=DEFAULT_PROFILE):
+        self.min_range = min_range
+        self.max_range = max_range
+        self.max_attempts = max_attempts
+        self.attempts_left = max_attempts
+        self.current_attempts = 0
+        self.active = True
+        self.won = False
+        # Tier boundaries and hint texts, built once per range size and shared
+        self.hints = profile.table(max_range - min_range + 1)
+        self.hint_limits = self.hints.limits
+
+        # Generate secret number (randint draws from getrandbits, so any size is exact)
+        self.seed = None
+        if secret_number is None:
+            if rng is None:
+                if seed is None:
+                    seed = SECURE_RNG.getrandbits(SEED_BITS)
+                self.seed = seed
+                rng = random.Random(seed)
+            secret_number = rng.randint(min_range, max_range)
+        self.secret_number = secret_number
+        self.guesses = []
+
+        self.mode = mode
+        self.time_limit_ns = int(time_limit * 1e9) if time_limit else None
+        self.clock = clock
+        self.started_ns = self.last_guess_ns = clock()
+        self.guess_ns = []
+        self.finished_ns = None
+
+    @property
+    def range_key(self):
+        return f"{self.min_range}-{self.max_range}"
+
+    def elapsed_ns(self):
+        """Time since the session started, frozen once it is finished"""
+        end = self.finished_ns if self.finished_ns is not None else self.clock()
+        return end - self.started_ns
+
+    def time_left_ns(self):
+        """Nanoseconds left in a timed game (None without a limit)"""
+        if self.time_limit_ns is None:
+            return None
+        return max(0, self.time_limit_ns - self.elapsed_ns())
+
+    def expire(self):
+        """End a timed game whose limit has passed (views call this from their countdown)"""
+        if not self.active or self.time_left_ns() != 0:
+            return None
+        self.active = False
+        self.finished_ns = self.started_ns + self.time_limit_ns
+        return GuessResult('lost', f"⏰ Time's up! The number was {self.secret_number}.", 'danger')
+
+    def guess(self, value):
+        """Apply a guess (string or int) and return a GuessResult"""
+        GUESSES.inc()
+        if not self.active:
+            return GuessResult('invalid', "🎲 Start a new game first!", 'warning')
+        if self.time_limit_ns is not None and self.time_left_ns() == 0:
+            return self.expire()
+
+        try:
+            guess = parse_number(value)
+        except (TypeError, ValueError):
+            return GuessResult('invalid', "🤔 Please enter a valid number!", 'warning')
+
+        if guess < self.min_range or guess > self.max_range:
+            return GuessResult('out_of_range',
+                               f"⚠️ Please guess between {self.min_range} and {self.max_range}!",
+                               'warning')
+
+        self.current_attempts += 1
+        self.attempts_left -= 1
+        self.guesses.append(guess)
+        now = self.clock()
+        self.guess_ns.append(now - self.last_guess_ns)
+        self.last_guess_ns = now
+
+        if guess == self.secret_number:
+            # Winner!
+            self.active = False
+            self.won = True
+            self.finished_ns = now
+            timing = f" in {self.elapsed_ns() / 1e9:.2f}s" if self.mode != MODE_CLASSIC else ""
+            return GuessResult('won',
+                               f"🎉 AMAZING! You guessed it in {self.current_attempts} attempts{timing}! 🏆",
+                               'success')
+
+        if self.attempts_left == 0:
+            # Out of attempts
+            self.active = False
+            self.finished_ns = now
+            return GuessResult('lost',
+                               f"😞 Game Over! The number was {self.secret_number}. Better luck next time!",
+                               'danger')
+
+        tier, hint = self.hints.hint(guess, self.secret_number)
+        return GuessResult('low' if guess < self.secret_number else 'high', hint, 'hint', tier)
+
+    def to_record(self):
+        """History record for a finished game"""
+        record = {
+            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'range': self.range_key,
+            'max_attempts': self.max_attempts,
+            'attempts_used': self.current_attempts,
+            'won': self.won,
+            'secret_number': self.secret_number,
+            'duration_ms': self.elapsed_ns() // 1_000_000
+        }
+        if self.seed is not None:
+            record['seed'] = self.seed
+            record['guesses'] = list(self.guesses)
+        if self.mode != MODE_CLASSIC:
+            # Per-guess response times only for the modes that compete on time
+            record['mode'] = self.mode
+            if self.time_limit_ns is not None:
+                record['time_limit'] = self.time_limit_ns / 1e9
+            record['guess_ms'] = [round(ns / 1e6, 3) for ns in self.guess_ns]
+        return record
+
+
+class GameEngine:
+    """Shared game state on top of a persistence backend.
+
+    Any number of GameSession objects can be played against one engine;
+    finished sessions are handed to record_result. Saving happens on the
+    backend's write-behind thread, so on_error may be called from that thread.
+    on_record, if set, is called with each stored record (e.g. to update a
+    leaderboard). profile is a difficulty.PROFILES name, a dict of
+    DifficultyProfile arguments or a profile; it sets the hint tiers and
+    difficulty labels of every session.
+    """
+
+    def __init__(self, backend=None, on_error=None, rng=None, profile=None):
+        self.backend = backend if backend is not None else JsonBackend()
+        self.backend.on_error = self.report_error
+        self.on_error = on_error
+        self.on_record = None
+        # Default secret generator for new sessions (None: seeded per session)
+        self.rng = rng
+        self.profile = get_profile(profile)
+
+    @property
+    def stats(self):
+        return self.backend.stats
+
+    @property
+    def best_scores(self):
+        return self.backend.best_scores
+
+    @property
+    def best_times(self):
+        """Fastest winning times in milliseconds from timed and speed-run games"""
+        return self.backend.best_times
+
+    def load(self):
+        """Load best scores, history and statistics"""
+        self.backend.load()
+        return self
+
+    def new_session(self, min_value, max_value, attempts_value=None, rng=None,
+                    mode=MODE_CLASSIC, time_limit=None):
+        """Validate settings and start a session (raises SettingsError)"""
+        min_val, max_val, max_attempts = parse_settings(min_value, max_value, attempts_value)
+        if mode not in MODES:
+            raise SettingsError("Invalid Mode", f"Mode must be one of {', '.join(MODES)}!")
+        if mode == MODE_TIMED:
+            try:
+                time_limit = float(time_limit)
+            except (TypeError, ValueError):
+                time_limit = 0
+            if time_limit <= 0:
+                raise SettingsError("Invalid Time Limit", "Timed games need a time limit in seconds!")
+        else:
+            time_limit = None
+        return GameSession(min_val, max_val, max_attempts, rng=rng or self.rng,
+                           mode=mode, time_limit=time_limit, profile=self.profile)
+
+    @metrics.timed('record_result')
+    def record_result(self, session):
+        """Store a finished session in the history, stats and best scores"""
+        GAMES.inc()
+        if session.won:
+            WINS.inc()
+        game_record = session.to_record()
+        try:
+            self.backend.append(game_record)
+
+            # Save best score if won
+            if session.won:
+                self.backend.record_best(session.min_range, session.max_range,
+                                         session.max_attempts, session.current_attempts)
+                if session.mode != MODE_CLASSIC:
+                    self.backend.record_best_time(session.min_range, session.max_range,
+                                                  session.max_attempts, game_record['duration_ms'])
+            if self.on_record is not None:
+                self.on_record(game_record)
+        except Exception as e:
+            self.report_error(e)
+        return game_record
+
+    @metrics.timed('record_many')
+    def record_many(self, records):
+        """Store a batch of finished-game records with one bulk write per file or table"""
+        records = list(records)
+        best = {}
+        for record in records:
+            if record['won']:
+                low, high = parse_range_key(record['range'])
+                key = (low, high, record['max_attempts'])
+                if key not in best or record['attempts_used'] < best[key]:
+                    best[key] = record['attempts_used']
+        GAMES.inc(len(records))
+        WINS.inc(sum(1 for record in records if record['won']))
+        try:
+            self.backend.extend(records)
+            self.backend.record_bests(best)
+            if self.on_record is not None:
+                for record in records:
+                    self.on_record(record)
+        except Exception as e:
+            self.report_error(e)
+        return records
+
+    def recent_games(self, count):
+        """The last `count` finished games, oldest first"""
+        return self.backend.recent(count)
+
+    def clear(self):
+        """Forget all best scores, history and statistics"""
+        try:
+            self.backend.clear()
+        except Exception as e:
+            self.report_error(e)
+
+    def report_error(self, error):
+        print(f"Error saving data: {error}")
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def close(self):
+        """Write everything still queued and release the backend"""
+        self.backend.close()
@@ -0,0 +1,153 @@
+"""Line-based asyncio server that hosts one game session per connection.
+
+Protocol (UTF-8, one command per line):
+
+    START <min> <max> <attempts> [timed <seconds>|speedrun]
+                                  ->  OK <info>          | ERR <title>: <message>
+    GUESS <number>                ->  LOW|HIGH|WON|LOST|RANGE|INVALID <feedback>
+    QUIT                          ->  BYE
+
+Feedback strings are the same ones the GUI shows, and finished games are
+recorded through GameEngine.record_result like any other game. The server
+keeps no timers: a timed game whose limit has passed is lost on the next GUESS.
+"""
+import asyncio
+import signal
+
+import metrics
+from game_engine import MODE_CLASSIC, SettingsError
+
+STATUS_WORDS = {
+    'low': b'LOW ',
+    'high': b'HIGH ',
+    'won': b'WON ',
+    'lost': b'LOST ',
+    'out_of_range': b'RANGE ',
+    'invalid': b'INVALID ',
+}
+
+MAX_LINE = 256
+
+# Seconds between metric snapshots when the server runs with --metrics
+METRICS_EXPORT_INTERVAL = 5.0
+
+
+class GameProtocol(asyncio.Protocol):
+    """One client connection and its current GameSession"""
+
+    __slots__ = ('server', 'transport', 'buffer', 'session', 'quitting')
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.buffer = b''
+        self.session = None
+        self.quitting = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+
+    def connection_lost(self, exc):
+        self.server.connections -= 1
+        self.transport = None
+
+    def data_received(self, data):
+        buffer = self.buffer + data
+        if b'\n' not in buffer:
+            if len(buffer) > MAX_LINE:
+                self.transport.write(b'ERR Line too long\n')
+                self.transport.close()
+                buffer = b''
+            self.buffer = buffer
+            return
+
+        # Answer every complete line in one write so pipelined clients are cheap
+        *lines, self.buffer = buffer.split(b'\n')
+        replies = [self.handle_line(line) for line in lines]
+        if self.transport is not None:
+            self.transport.write(b''.join(replies))
+            if self.quitting:
+                self.transport.close()
+
+    def handle_line(self, line):
+        parts = line.split()
+        if not parts:
+            return b''
+        command = parts[0].upper()
+
+        if command == b'GUESS' and len(parts) == 2:
+            if self.session is None:
+                return b'ERR No game in progress. Send START first.\n'
+            result = self.session.guess(parts[1])
+            if result.finished:
+                self.server.record(self.session)
+            return STATUS_WORDS[result.status] + result.message.encode() + b'\n'
+
+        if command == b'START' and 4 <= len(parts) <= 6:
+            mode = parts[4].decode('ascii', 'replace').lower() if len(parts) > 4 else MODE_CLASSIC
+            time_limit = parts[5] if len(parts) > 5 else None
+            try:
+                self.session = self.server.engine.new_session(*parts[1:4], mode=mode, time_limit=time_limit)
+            except SettingsError as e:
+                return f"ERR {e.title}: {e.message}\n".encode()
+            session = self.session
+            return f"OK 🎯 Guess a number between {session.min_range} and {session.max_range}\n".encode()
+
+        if command == b'QUIT':
+            self.quitting = True
+            return b'BYE\n'
+
+        return b'ERR Unknown command. Use START <min> <max> <attempts>, GUESS <n> or QUIT.\n'
+
+
+class GameServer:
+    """Owns the shared engine and the listening socket"""
+
+    def __init__(self, engine, metrics_exporter=None):
+        self.engine = engine
+        self.metrics_exporter = metrics_exporter
+        self.connections = 0
+        self.games_recorded = 0
+
+    def record(self, session):
+        self.engine.record_result(session)
+        self.games_recorded += 1
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: GameProtocol(self), host, port,
+                                          backlog=4096, reuse_address=True)
+        print(f"Serving the guessing game on {host}:{port}")
+
+        # Stop cleanly on SIGINT/SIGTERM so the engine gets flushed
+        stopped = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stopped.done() or stopped.set_result(None))
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on Windows; Ctrl+C still raises KeyboardInterrupt
+        if self.metrics_exporter is not None:
+            self.export_metrics(loop)
+        async with server:
+            await stopped
+
+    def export_metrics(self, loop):
+        self.metrics_exporter.export()
+        loop.call_later(METRICS_EXPORT_INTERVAL, self.export_metrics, loop)
+
+
+def run_server(engine, host="127.0.0.1", port=5050, metrics_path=None):
+    """Run the game server until interrupted, then flush the engine"""
+    exporter = None
+    if metrics_path:
+        metrics.enable()
+        exporter = metrics.MetricsExporter(metrics_path, engine.backend.writer)
+    try:
+        asyncio.run(GameServer(engine, exporter).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            exporter.export()
+        engine.close()
@@ -0,0 +1,166 @@
+from array import array
+from datetime import datetime, timedelta
+
+# Dates are kept as naive seconds since this epoch, so they round-trip exactly
+EPOCH = datetime(1970, 1, 1)
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+CORE_FIELDS = ('date', 'range', 'max_attempts', 'attempts_used', 'won', 'secret_number')
+
+# Optional column; older records without it store NO_DURATION
+DURATION_FIELD = 'duration_ms'
+NO_DURATION = -1
+
+# Replay data of seeded games: the seed column plus a flat array of every
+# guess, sliced per game by guess_offsets; unseeded games store NO_SEED
+SEED_FIELD = 'seed'
+GUESSES_FIELD = 'guesses'
+NO_SEED = -1
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Marks an extras entry holding a whole record that didn't fit the columns
+_RAW = '__raw__'
+
+
+def date_to_epoch(date):
+    return (datetime.fromisoformat(date) - EPOCH) // timedelta(seconds=1)
+
+
+def epoch_to_date(seconds):
+    return (EPOCH + timedelta(seconds=seconds)).strftime(DATE_FORMAT)
+
+
+class CompactHistory:
+    """Columnar, list-like container for game records.
+
+    Instead of a six-key dict per game, every field lives in a typed array:
+    epoch-second timestamps, interned range ids, attempt counts, a won flag
+    byte, the secret number and, when recorded, the duration, seed and
+    guesses. Any other fields (and values that don't fit in 64 bits) are
+    kept in a sparse side table. Indexing,
+    slicing and iteration hand back ordinary record dicts, so code written for
+    a list of dicts keeps working.
+    """
+
+    def __init__(self, records=()):
+        self.timestamps = array('q')
+        self.range_ids = array('q')
+        self.max_attempts = array('q')
+        self.attempts_used = array('q')
+        self.won = bytearray()
+        self.secrets = array('q')
+        self.durations = array('q')
+        self.seeds = array('q')
+        self.guess_offsets = array('q', [0])
+        self.guess_values = array('q')
+        self.ranges = []
+        self._range_index = {}
+        self.extras = {}
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.won)
+
+    def __bool__(self):
+        return len(self.won) > 0
+
+    def __iter__(self):
+        for i in range(len(self.won)):
+            yield self._record(i)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._record(i) for i in range(*item.indices(len(self.won)))]
+        if item < 0:
+            item += len(self.won)
+        if not 0 <= item < len(self.won):
+            raise IndexError("history index out of range")
+        return self._record(item)
+
+    def append(self, record):
+        index = len(self.won)
+        try:
+            date = record['date']
+            if len(date) != 19 or date[10] != ' ':
+                raise ValueError(date)  # Not DATE_FORMAT, so it would not round-trip
+            timestamp = date_to_epoch(date)
+            range_id = self._intern(record['range'])
+            numbers = [int(record[field]) for field in ('max_attempts', 'attempts_used', 'secret_number')]
+            won = 1 if record['won'] else 0
+        except (KeyError, TypeError, ValueError):
+            # Malformed record: keep it verbatim rather than lose it
+            self._append_columns(0, 0, 0, 0, 0, 0, NO_DURATION, NO_SEED, ())
+            self.extras[index] = {_RAW: dict(record)}
+            return
+
+        extra = {key: value for key, value in record.items() if key not in CORE_FIELDS}
+        duration = extra.pop(DURATION_FIELD, None)
+        if type(duration) is not int or not 0 <= duration <= INT64_MAX:
+            if duration is not None:
+                extra[DURATION_FIELD] = duration
+            duration = NO_DURATION
+        seed = extra.get(SEED_FIELD)
+        guesses = extra.get(GUESSES_FIELD)
+        if (type(seed) is int and 0 <= seed <= INT64_MAX and type(guesses) is list
+                and all(type(guess) is int and INT64_MIN <= guess <= INT64_MAX for guess in guesses)):
+            del extra[SEED_FIELD], extra[GUESSES_FIELD]
+        else:
+            seed, guesses = NO_SEED, ()
+        for position, field in enumerate(('max_attempts', 'attempts_used', 'secret_number')):
+            if not INT64_MIN <= numbers[position] <= INT64_MAX:
+                extra[field] = numbers[position]
+                numbers[position] = 0
+        self._append_columns(timestamp, range_id, *numbers, won, duration, seed, guesses)
+        if extra:
+            self.extras[index] = extra
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def clear(self):
+        self.__init__()
+
+    def _intern(self, range_key):
+        range_id = self._range_index.get(range_key)
+        if range_id is None:
+            range_id = self._range_index[range_key] = len(self.ranges)
+            self.ranges.append(range_key)
+        return range_id
+
+    def _append_columns(self, timestamp, range_id, max_attempts, attempts_used, secret, won, duration,
+                        seed, guesses):
+        self.timestamps.append(timestamp)
+        self.range_ids.append(range_id)
+        self.max_attempts.append(max_attempts)
+        self.attempts_used.append(attempts_used)
+        self.secrets.append(secret)
+        self.won.append(won)
+        self.durations.append(duration)
+        self.seeds.append(seed)
+        self.guess_values.extend(guesses)
+        self.guess_offsets.append(len(self.guess_values))
+
+    def _record(self, i):
+        extra = self.extras.get(i)
+        if extra is not None and _RAW in extra:
+            return dict(extra[_RAW])
+        record = {
+            'date': epoch_to_date(self.timestamps[i]),
+            'range': self.ranges[self.range_ids[i]],
+            'max_attempts': self.max_attempts[i],
+            'attempts_used': self.attempts_used[i],
+            'won': bool(self.won[i]),
+            'secret_number': self.secrets[i]
+        }
+        if self.durations[i] != NO_DURATION:
+            record[DURATION_FIELD] = self.durations[i]
+        if self.seeds[i] != NO_SEED:
+            record[SEED_FIELD] = self.seeds[i]
+            record[GUESSES_FIELD] = self.guess_values[self.guess_offsets[i]:self.guess_offsets[i + 1]].tolist()
+        if extra:
+            record.update(extra)
+        return record
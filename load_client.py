@@ -0,0 +1,158 @@
+"""Local load generator for game_server.py.
+
+Opens a number of idle connections (to check how many sessions the server can
+hold) plus a number of active ones that play binary-search games as fast as
+the server answers, then reports guesses/sec and games/sec.
+
+A binary search waits for every reply before its next guess, so each
+connection has one request in flight and the round trips, not the server,
+set the pace. With a pipeline depth the active connections instead send a
+whole game per write - START plus that many blind guesses on a 1-10^18 board
+- and only wait for the last reply, which measures the server's request rate.
+"""
+import asyncio
+import os
+import random
+import time
+
+START_LINE = b'START 1 1000000 20\n'
+
+# Range for pipelined games: blind guesses practically never win, so every game uses all its attempts
+PIPELINE_RANGE = 10 ** 18
+
+
+class LoadStats:
+    def __init__(self):
+        self.guesses = 0
+        self.games = 0
+        self.errors = 0
+
+
+class PlayerProtocol(asyncio.Protocol):
+    """Plays back-to-back binary-search games over one connection"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.transport = None
+        self.buffer = b''
+        self.low = 1
+        self.high = 1000000
+        self.last_guess = 0
+        self.running = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.write(START_LINE)
+
+    def data_received(self, data):
+        *lines, self.buffer = (self.buffer + data).split(b'\n')
+        for line in lines:
+            self.handle_reply(line)
+
+    def handle_reply(self, line):
+        word = line.split(b' ', 1)[0]
+        if word == b'OK':
+            self.low, self.high = 1, 1000000
+        elif word == b'LOW':
+            self.stats.guesses += 1
+            self.low = self.last_guess + 1
+        elif word == b'HIGH':
+            self.stats.guesses += 1
+            self.high = self.last_guess - 1
+        elif word in (b'WON', b'LOST'):
+            self.stats.guesses += 1
+            self.stats.games += 1
+            if self.running:
+                self.transport.write(START_LINE)
+            return
+        else:
+            self.stats.errors += 1
+            return
+
+        if self.running:
+            self.last_guess = (self.low + self.high) // 2
+            self.transport.write(b'GUESS %d\n' % self.last_guess)
+
+
+class PipelinedProtocol(asyncio.Protocol):
+    """Plays back-to-back games of `depth` blind guesses, one write per game"""
+
+    def __init__(self, stats, depth, seed=None):
+        self.stats = stats
+        self.depth = depth
+        self.rng = random.Random(seed)
+        self.start_line = b'START 1 %d %d\n' % (PIPELINE_RANGE, depth)
+        self.transport = None
+        self.buffer = b''
+        self.pending = 0
+        self.running = True
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.send_game()
+
+    def send_game(self):
+        randint = self.rng.randint
+        guesses = b''.join(b'GUESS %d\n' % randint(1, PIPELINE_RANGE) for _ in range(self.depth))
+        self.pending = self.depth + 1
+        self.transport.write(self.start_line + guesses)
+
+    def data_received(self, data):
+        *lines, self.buffer = (self.buffer + data).split(b'\n')
+        stats = self.stats
+        for line in lines:
+            word = line.split(b' ', 1)[0]
+            if word in (b'LOW', b'HIGH'):
+                stats.guesses += 1
+            elif word in (b'WON', b'LOST'):
+                stats.guesses += 1
+                stats.games += 1
+            elif word == b'INVALID':
+                # A lucky win leaves the rest of the game's guesses without a session
+                stats.guesses += 1
+            elif word != b'OK':
+                stats.errors += 1
+        self.pending -= len(lines)
+        if self.pending <= 0 and self.running:
+            self.send_game()
+
+
+async def run_load(host, port, active=100, idle=0, duration=10.0, pipeline=0):
+    loop = asyncio.get_running_loop()
+    stats = LoadStats()
+
+    idle_transports = []
+    for _ in range(idle):
+        transport, _ = await loop.create_connection(asyncio.Protocol, host, port)
+        idle_transports.append(transport)
+    print(f"Holding {len(idle_transports)} idle connections")
+
+    players = []
+    for i in range(active):
+        if pipeline:
+            factory = lambda: PipelinedProtocol(stats, pipeline, seed=i)
+        else:
+            factory = lambda: PlayerProtocol(stats)
+        _, protocol = await loop.create_connection(factory, host, port)
+        players.append(protocol)
+
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - started
+    for player in players:
+        player.running = False
+        player.transport.close()
+    for transport in idle_transports:
+        transport.close()
+
+    style = f"pipelined {pipeline} guesses per write" if pipeline else "binary search, one request in flight"
+    print(f"{active} active / {idle} idle connections for {elapsed:.1f}s ({style}, {os.cpu_count()} CPUs)")
+    print(f"  guesses/sec: {stats.guesses / elapsed:,.0f}")
+    print(f"  games/sec:   {stats.games / elapsed:,.0f}")
+    if stats.errors:
+        print(f"  errors:      {stats.errors}")
+    return stats
+
+
+def run_load_client(host="127.0.0.1", port=5050, active=100, idle=0, duration=10.0, pipeline=0):
+    return asyncio.run(run_load(host, port, active, idle, duration, pipeline))
@@ -0,0 +1,328 @@
+"""Merge game histories from several machines into one, dropping duplicates.
+
+Two records are the same game when they share (date, range, secret_number,
+attempts_used). The merge streams every input once and never holds the whole
+history in memory:
+
+1. The target's existing history and then every input are routed into
+   bucket files on disk by a hash of that key, tagged with their position.
+   Best scores are folded in on the way, since a duplicate can't beat the
+   game it copies.
+2. Each bucket is deduplicated on its own with a set of key hashes, so
+   memory is bounded by the bucket size (the number of buckets grows with
+   the input size), and the first copy of every game is kept.
+3. The buckets, each already in position order, are merged back with a heap
+   and only games that were not in the target are appended, in input order,
+   as their original JSON text. The stats then catch up from the log tail,
+   so nothing is rescanned.
+
+Inputs can be JSON-Lines logs, legacy JSON array files and SQLite databases.
+"""
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+
+from scores import BestScoreIndex, parse_range_key
+from stats import StatsAggregator
+from storage import HistoryLog, JsonArrayReader
+
+# Roughly how many records a bucket's hash set should hold
+BUCKET_RECORDS = 500000
+
+# Assumed average record size when sizing buckets from file sizes
+RECORD_BYTES_ESTIMATE = 120
+
+# Open bucket files at once, and the most there can be
+MAX_BUCKETS = 512
+
+# Records per append when writing the merged games out
+WRITE_BATCH = 50000
+
+
+def record_key(record):
+    """128-bit hash of (date, range, secret_number, attempts_used); raises on malformed records"""
+    parse_range_key(record['range'])
+    key = f"{record['date']}\x1f{record['range']}\x1f{int(record['secret_number'])}\x1f{int(record['attempts_used'])}"
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=16).digest(), 'big')
+
+
+def check_record(record):
+    """Coerce the counts to ints and `won` to a bool in place; raises on malformed records.
+
+    Returns whether anything had to be converted.
+    """
+    coerced = False
+    for field in ('secret_number', 'attempts_used', 'max_attempts'):
+        value = record[field]
+        if isinstance(value, bool):
+            raise ValueError(f"{field} is not a number")
+        number = int(value)
+        # Accept "7" and 7.0, not 7.5 or "7 "
+        if number != value and str(number) != value:
+            raise ValueError(f"{field} is not a whole number: {value!r}")
+        if type(value) is not int:
+            record[field] = number
+            coerced = True
+    if record['max_attempts'] < 1 or record['attempts_used'] < 0:
+        raise ValueError("Attempt counts out of range")
+    won = record['won']
+    if won not in (True, False):
+        raise ValueError(f"won is not a boolean: {won!r}")
+    if type(won) is not bool:
+        record['won'] = bool(won)
+        coerced = True
+    return coerced
+
+
+def iter_source(path):
+    """(record, JSON text or None) for a .jsonl log, a .db database or a JSON array file.
+
+    Damaged entries come through as a None record.
+    """
+    if path.endswith('.jsonl'):
+        # Keep each line's text so it can be copied into the target without re-encoding
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line), line
+                except ValueError:
+                    yield None, None
+    elif path.endswith('.db'):
+        from backends import SqliteBackend
+        backend = SqliteBackend(path).connect()
+        try:
+            for record in backend.iter_records():
+                yield record, None
+        finally:
+            backend.close()
+    else:
+        reader = JsonArrayReader(path)
+        for record in reader:
+            yield record, None
+        for _ in range(reader.damaged):
+            yield None, None
+
+
+class MergeReport:
+    def __init__(self):
+        self.read = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.existing = 0
+        self.added = 0
+        self.new_best = 0
+
+    def summary(self):
+        return (f"Read {self.read:,} records: {self.added:,} added, {self.duplicates:,} duplicates "
+                f"skipped, {self.invalid:,} invalid, {self.existing:,} already in the history; "
+                f"new best score on {self.new_best:,} settings")
+
+
+class JsonTarget:
+    """Appends to the JSON-Lines log and rewrites best_scores.json / best_times.json once"""
+
+    def __init__(self, directory=None):
+        def path(name):
+            return os.path.join(directory, name) if directory else name
+        self.history_log = HistoryLog(path("game_history.jsonl"), path("game_history.json"),
+                                      sync_every=WRITE_BATCH)
+        self.best_scores_path = path("best_scores.json")
+        self.best_times_path = path("best_times.json")
+        self.stats_path = path("game_stats.json")
+        self.history_log.migrate_legacy()
+        self.best_scores = BestScoreIndex.load(self.best_scores_path)
+        self.best_times = BestScoreIndex.load(self.best_times_path)
+
+    def existing(self):
+        return self.history_log.iter_records()
+
+    def size_hint(self):
+        return self.history_log.size()
+
+    def append(self, lines):
+        # A torn last line would swallow the first merged record
+        self.history_log.ensure_newline()
+        self.history_log.append_lines(lines)
+
+    def finish(self, write=True):
+        self.history_log.close()
+        if not write:
+            return
+        self.best_scores.save(self.best_scores_path)
+        self.best_times.save(self.best_times_path)
+        # Replays only the appended tail past the saved snapshot
+        StatsAggregator(self.stats_path).load(self.history_log)
+
+
+class SqliteTarget:
+    """Inserts into the games table in batches, upserting only improved best scores"""
+
+    def __init__(self, path):
+        from backends import SqliteBackend
+        self.backend = SqliteBackend(path).load()
+        self.best_scores = self.backend.best_scores
+        self.best_times = self.backend.best_times
+        self.changed = {}
+
+    def existing(self):
+        return self.backend.iter_records()
+
+    def size_hint(self):
+        return self.backend.last_id() * RECORD_BYTES_ESTIMATE
+
+    def append(self, lines):
+        self.backend.insert_rows([self.backend.row_for(json.loads(line)) for line in lines])
+        self.backend.conn.commit()
+
+    def finish(self, write=True):
+        backend = self.backend
+        if not write:
+            backend.close()
+            return
+        for (table, low, high, max_attempts), best in self.changed.items():
+            backend.upsert_best(low, high, max_attempts, best, table)
+        backend.rebuild_stats(backend.last_id())
+        backend.close()
+
+
+def bucket_count(sources, target):
+    total = target.size_hint()
+    for path in sources:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return max(1, min(MAX_BUCKETS, total // (BUCKET_RECORDS * RECORD_BYTES_ESTIMATE) + 1))
+
+
+def merge_histories(sources, target, dry_run=False, workdir=None):
+    """Append every game from `sources` that `target` doesn't have yet; returns a MergeReport"""
+    report = MergeReport()
+    buckets = bucket_count(sources, target)
+    improved = set()
+    tmp = tempfile.mkdtemp(prefix="merge-", dir=workdir)
+    try:
+        # 1. Partition into "<position> <hash> <JSON>" lines, in position order within each
+        # bucket. The target's own games only need their hash.
+        files = [open(os.path.join(tmp, f"bucket-{i}"), "w", encoding="utf-8") for i in range(buckets)]
+        position = 0
+        try:
+            for record in target.existing():
+                try:
+                    key = record_key(record)
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    continue
+                files[key % buckets].write(f"{position} {key:x} \n")
+                position += 1
+            existing = position
+            for path in sources:
+                for record, text in iter_source(path):
+                    report.read += 1
+                    try:
+                        coerced = check_record(record)
+                        key = record_key(record)
+                    except (KeyError, TypeError, ValueError, AttributeError):
+                        report.invalid += 1
+                        continue
+                    if coerced:
+                        # Store the converted values, not the original text
+                        text = None
+                    # A duplicate is the same game, so folding it in can't change the outcome
+                    if record['won']:
+                        update_best(target, record, improved)
+                    if text is None:
+                        text = json.dumps(record, separators=(",", ":"))
+                    files[key % buckets].write(f"{position} {key:x} {text}\n")
+                    position += 1
+        finally:
+            for f in files:
+                f.close()
+
+        # 2. Deduplicate each bucket with its own hash set
+        for i in range(buckets):
+            bucket_path = os.path.join(tmp, f"bucket-{i}")
+            # key -> whether the target already had it
+            seen = {}
+            with open(bucket_path, "r", encoding="utf-8") as src, \
+                    open(bucket_path + ".kept", "w", encoding="utf-8") as dst:
+                for line in src:
+                    line_position, key, text = line.split(" ", 2)
+                    in_target = int(line_position) < existing
+                    if key in seen:
+                        if not in_target:
+                            if seen[key]:
+                                report.existing += 1
+                            else:
+                                report.duplicates += 1
+                        continue
+                    seen[key] = in_target
+                    if not in_target:
+                        dst.write(f"{line_position} {text}")
+            os.remove(bucket_path)
+
+        # 3. Merge the buckets back into input order and append the new games
+        kept = [open(os.path.join(tmp, f"bucket-{i}.kept"), "r", encoding="utf-8") for i in range(buckets)]
+        try:
+            streams = [((int(line.split(" ", 1)[0]), line) for line in f) for f in kept]
+            batch = []
+            for _, line in heapq.merge(*streams):
+                batch.append(line[line.index(" ") + 1:-1])
+                if len(batch) >= WRITE_BATCH:
+                    report.added += len(batch)
+                    if not dry_run:
+                        target.append(batch)
+                    batch = []
+            report.added += len(batch)
+            if batch and not dry_run:
+                target.append(batch)
+        finally:
+            for f in kept:
+                f.close()
+        report.new_best = len(improved)
+        target.finish(write=not dry_run)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return report
+
+
+def update_best(target, record, improved):
+    """Fold one merged win into the best scores (and best times), adding improved settings to `improved`"""
+    low, high = parse_range_key(record['range'])
+    max_attempts = record['max_attempts']
+    if target.best_scores.record(low, high, max_attempts, record['attempts_used']):
+        improved.add((low, high, max_attempts))
+        if isinstance(target, SqliteTarget):
+            target.changed[('best_scores', low, high, max_attempts)] = record['attempts_used']
+    if record.get('mode', 'classic') != 'classic' and isinstance(record.get('duration_ms'), int):
+        if target.best_times.record(low, high, max_attempts, record['duration_ms']):
+            if isinstance(target, SqliteTarget):
+                target.changed[('best_times', low, high, max_attempts)] = record['duration_ms']
+
+
+def run_merge(sources, config, directory=None, dry_run=False):
+    missing = [path for path in sources if not os.path.exists(path)]
+    if missing:
+        print(f"Not found: {', '.join(missing)}")
+        return None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    try:
+        if config['backend'] == 'sqlite':
+            database = config['database']
+            if directory:
+                database = os.path.join(directory, os.path.basename(database))
+            target = SqliteTarget(database)
+        else:
+            target = JsonTarget(directory)
+        report = merge_histories(sources, target, dry_run, workdir=directory or ".")
+    except (OSError, ValueError) as e:
+        print(f"Error merging histories: {e}")
+        return None
+    print(("Dry run - nothing written. " if dry_run else "") + report.summary())
+    return report
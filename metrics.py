@@ -0,0 +1,227 @@
+"""Lightweight counters and latency histograms for the hot paths.
+
+Collection is off until enable() is called. While off, a timed function pays
+a single flag check and counters return straight away, so the decorators can
+stay on make_guess, record_result and friends in normal play. Everything is
+exported in the Prometheus text format, either to a file or to the in-app
+diagnostics window.
+
+Updates are not locked: the GUI thread and the write-behind thread touch
+different metrics, and an occasional lost increment is acceptable here.
+"""
+import bisect
+import functools
+import os
+import time
+
+PREFIX = "guessing_"
+
+# Upper bounds in seconds, from 50 microseconds to 5 seconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_enabled = False
+_started = time.monotonic()
+
+# Every metric created so far, by name
+REGISTRY = {}
+
+
+def enable(flag=True):
+    """Turn collection on (or off); counts so far are kept"""
+    global _enabled, _started
+    if flag and not _enabled:
+        _started = time.monotonic()
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+class Counter:
+    """Monotonic count, e.g. guesses played or bytes saved"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        if _enabled:
+            self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+    def samples(self):
+        yield PREFIX + self.name, self.value
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets, plus their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        if _enabled:
+            self.record(value)
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        """Context manager that observes the time spent in its block"""
+        return _Timer(self)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations"""
+        target = self.count * fraction
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return float('inf') if self.count else 0.0
+
+    def samples(self):
+        name = PREFIX + self.name
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{le="{bound:g}"}}', cumulative
+        yield f'{name}_bucket{{le="+Inf"}}', self.count
+        yield f'{name}_sum', self.sum
+        yield f'{name}_count', self.count
+
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+
+    def __enter__(self):
+        if _enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started is not None:
+            self.histogram.record(time.perf_counter() - self.started)
+            self.started = None
+
+
+def counter(name, help_text):
+    """The counter with this name, created on first use"""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        metric = REGISTRY[name] = Counter(name, help_text)
+    return metric
+
+
+def histogram(name, help_text, buckets=LATENCY_BUCKETS):
+    """The histogram with this name, created on first use"""
+    metric = REGISTRY.get(name)
+    if metric is None:
+        metric = REGISTRY[name] = Histogram(name, help_text, buckets)
+    return metric
+
+
+def timer(name, help_text=None):
+    """Context manager timing a block into the '<name>_seconds' histogram"""
+    return histogram(f"{name}_seconds", help_text or f"Time spent in {name}").time()
+
+
+def timed(name, help_text=None):
+    """Decorator timing every call into the '<name>_seconds' histogram"""
+    def decorate(func):
+        metric = histogram(f"{name}_seconds", help_text or f"Time spent in {func.__qualname__}")
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.record(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def reset():
+    for metric in REGISTRY.values():
+        metric.reset()
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in sorted(REGISTRY.values(), key=lambda m: m.name):
+        name = PREFIX + metric.name
+        lines.append(f"# HELP {name} {metric.help_text}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for sample, value in metric.samples():
+            lines.append(f"{sample} {value:g}" if isinstance(value, float) else f"{sample} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, text=None):
+    """Write the exposition text atomically, for node_exporter's textfile collector"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus() if text is None else text)
+    os.replace(tmp_path, path)
+
+
+def summary():
+    """Human-readable digest for the diagnostics window"""
+    uptime = max(time.monotonic() - _started, 1e-9)
+    lines = [f"Collecting for {uptime:.0f}s" if _enabled else "Collection is off"]
+    for metric in sorted(REGISTRY.values(), key=lambda m: m.name):
+        if metric.kind == 'counter':
+            lines.append(f"{metric.name:<30} {metric.value:>10}  ({metric.value / uptime:.2f}/s)")
+        else:
+            lines.append(f"{metric.name:<30} {metric.count:>10}  mean {metric.mean * 1000:.3f} ms"
+                         f"  p50 ≤{metric.quantile(0.5) * 1000:g} ms"
+                         f"  p99 ≤{metric.quantile(0.99) * 1000:g} ms")
+    return "\n".join(lines)
+
+
+class MetricsExporter:
+    """Periodically hands a rendered snapshot to a write-behind worker.
+
+    Rendering is cheap and happens on the caller's thread; the file write is
+    queued as a keyed job, so only the latest snapshot is ever written.
+    """
+
+    def __init__(self, path, writer):
+        self.path = path
+        self.writer = writer
+
+    def export(self):
+        text = render_prometheus()
+        self.writer.submit(key='metrics', job=lambda: write_prometheus(self.path, text))
@@ -0,0 +1,311 @@
+"""Player profiles, each with its own storage shard, and a shared leaderboard.
+
+The guest profile keeps using the files in the current directory, so
+existing records carry over; every other player gets players/<name>/ with
+the same set of files (or database) inside. Only the most recently used
+profiles stay loaded, and the cross-player leaderboard is updated from each
+recorded game rather than by rescanning every shard.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from backends import load_config, open_backend
+from game_engine import GameEngine, MODE_CLASSIC
+from scores import format_range, parse_range_key
+from storage import WriteBehindWorker, write_json_atomic
+
+PLAYERS_DIR = "players"
+DEFAULT_PLAYER = "Guest"
+# Kept next to the player directories (with a .tmp while it is being written)
+LEADERBOARD_FILE = "leaderboard.json"
+
+# Names double as directory names
+_PLAYER_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9 _.-]{0,31}$')
+
+
+def check_player_name(name):
+    """Strip and validate a player name (raises ValueError)"""
+    name = name.strip()
+    if not _PLAYER_NAME.match(name) or name.endswith('.'):
+        raise ValueError("Player names are 1-32 letters, digits, spaces, '.', '_' or '-'")
+    if name.lower().startswith(LEADERBOARD_FILE):
+        raise ValueError(f"'{name}' is reserved, please pick another player name")
+    return name
+
+
+class Leaderboard:
+    """Cross-player standings: per-player totals and who holds each best score.
+
+    update() is O(1) per game. Per-setting holders are kept for every player,
+    so clearing one profile falls back to the next best player's score
+    without reading any shard. `marks` records what each player's shard
+    looked like when it was last counted, so games written to it by other
+    tools are picked up on the next load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.players = {}
+        # (min, max, max_attempts) -> {player: best attempts}
+        self.scores = {}
+        # Same layout for the fastest timed and speed-run wins, in milliseconds
+        self.times = {}
+        self.player_keys = {}
+        self.player_time_keys = {}
+        # player -> shard_mark() as of the last save
+        self.marks = {}
+        # Held while changing the tables and while to_json() runs on the writer thread
+        self.lock = threading.RLock()
+
+    def update(self, player, record, stats):
+        """Account for one recorded game of `player`"""
+        with self.lock:
+            self._update(player, record, stats)
+
+    def _update(self, player, record, stats):
+        self.players[player] = {'games': stats.total, 'wins': stats.wins,
+                                'best_attempts': stats.best_attempts}
+        if record['won']:
+            low, high = parse_range_key(record['range'])
+            key = (low, high, record['max_attempts'])
+            self.set_best(player, key, record['attempts_used'])
+            if record.get('mode', MODE_CLASSIC) != MODE_CLASSIC and 'duration_ms' in record:
+                self.set_best(player, key, record['duration_ms'], self.times, self.player_time_keys)
+
+    def set_best(self, player, key, value, table=None, player_keys=None):
+        table = self.scores if table is None else table
+        player_keys = self.player_keys if player_keys is None else player_keys
+        holders = table.setdefault(key, {})
+        best = holders.get(player)
+        if best is None or value < best:
+            holders[player] = value
+            player_keys.setdefault(player, set()).add(key)
+
+    def set_player(self, player, stats, best_scores, best_times=None):
+        """Replace everything known about a player (after loading or clearing)"""
+        with self.lock:
+            self._set_player(player, stats, best_scores, best_times)
+
+    def _set_player(self, player, stats, best_scores, best_times):
+        self.remove_player(player)
+        self.players[player] = {'games': stats.total, 'wins': stats.wins,
+                                'best_attempts': stats.best_attempts}
+        for key, best in best_scores.scores.items():
+            self.set_best(player, key, best)
+        if best_times is not None:
+            for key, best in best_times.scores.items():
+                self.set_best(player, key, best, self.times, self.player_time_keys)
+
+    def remove_player(self, player):
+        with self.lock:
+            self._remove_player(player)
+
+    def _remove_player(self, player):
+        self.players.pop(player, None)
+        self.marks.pop(player, None)
+        for table, player_keys in ((self.scores, self.player_keys), (self.times, self.player_time_keys)):
+            for key in player_keys.pop(player, ()):
+                holders = table[key]
+                holders.pop(player, None)
+                if not holders:
+                    del table[key]
+
+    def ranking(self):
+        """[(player, games, wins, win rate %)] with the most wins first"""
+        rows = [(player, totals['games'], totals['wins'],
+                 totals['wins'] / totals['games'] * 100 if totals['games'] else 0.0)
+                for player, totals in self.players.items()]
+        return sorted(rows, key=lambda row: (-row[2], -row[3], row[0]))
+
+    def record_holders(self, table=None):
+        """[((min, max, max_attempts), best, [players])] sorted by setting"""
+        table = self.scores if table is None else table
+        rows = []
+        for key in sorted(table):
+            holders = table[key]
+            best = min(holders.values())
+            rows.append((key, best, sorted(player for player, value in holders.items() if value == best)))
+        return rows
+
+    def summary(self, top=10):
+        lines = ["🌍 PLAYERS", "=" * 20]
+        for player, games, wins, rate in self.ranking()[:top]:
+            lines.append(f"{player}: {wins} wins / {games} games ({rate:.1f}%)")
+        lines += ["", "🏆 RECORD HOLDERS", "=" * 20]
+        for (low, high, max_attempts), best, players in self.record_holders():
+            lines.append(f"{format_range((low, high))} in {max_attempts}: {best} attempts - {', '.join(players)}")
+        if self.times:
+            lines += ["", "⏱️ FASTEST TIMES", "=" * 20]
+            for (low, high, max_attempts), best, players in self.record_holders(self.times):
+                lines.append(f"{format_range((low, high))} in {max_attempts}: {best / 1000:.2f}s - {', '.join(players)}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        # Copies, since the result is written out after the lock is released
+        return {'players': {player: dict(totals) for player, totals in self.players.items()},
+                'scores': [[low, high, max_attempts, player, best]
+                           for (low, high, max_attempts), holders in self.scores.items()
+                           for player, best in holders.items()],
+                'times': [[low, high, max_attempts, player, best]
+                          for (low, high, max_attempts), holders in self.times.items()
+                          for player, best in holders.items()],
+                'marks': dict(self.marks)}
+
+    def load(self):
+        """Read the saved leaderboard; returns False when there is none"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.players = data['players']
+        for low, high, max_attempts, player, best in data['scores']:
+            self.set_best(player, (low, high, max_attempts), best)
+        for low, high, max_attempts, player, best in data.get('times', ()):
+            self.set_best(player, (low, high, max_attempts), best, self.times, self.player_time_keys)
+        self.marks = data.get('marks', {})
+        return True
+
+
+class ProfileStore:
+    """Loaded GameEngines per player, least recently used evicted past `capacity`"""
+
+    def __init__(self, root=PLAYERS_DIR, config=None, capacity=3, on_error=None):
+        self.root = root
+        self.config = config or load_config()
+        self.capacity = capacity
+        self.on_error = on_error
+        self.engines = OrderedDict()
+        self.writer = WriteBehindWorker(on_error=self.report_error)
+        self.leaderboard = Leaderboard(os.path.join(root, LEADERBOARD_FILE))
+        # Players whose shard this store has counted or written to since loading
+        self.touched = set()
+
+    def players(self):
+        """The guest plus every player with a directory, sorted by name"""
+        names = []
+        if os.path.isdir(self.root):
+            names = sorted((name for name in os.listdir(self.root)
+                            if os.path.isdir(os.path.join(self.root, name))), key=str.lower)
+        return [DEFAULT_PLAYER] + names
+
+    def directory(self, player):
+        return None if player == DEFAULT_PLAYER else os.path.join(self.root, player)
+
+    def shard_mark(self, player):
+        """[size, mtime] of each file a player's games are written to"""
+        directory = self.directory(player) or ""
+        if self.config['backend'] == 'sqlite':
+            database = self.config['database']
+            if directory:
+                database = os.path.join(directory, os.path.basename(database))
+            paths = (database, database + "-wal")
+        else:
+            paths = (os.path.join(directory, "game_history.jsonl"),)
+        mark = []
+        for path in paths:
+            try:
+                status = os.stat(path)
+                mark += [status.st_size, status.st_mtime_ns]
+            except OSError:
+                mark += [0, 0]
+        return mark
+
+    def check_player(self, name):
+        """check_player_name, also rejecting names taken by a file in the players directory"""
+        name = check_player_name(name)
+        directory = self.directory(name)
+        if directory is not None and os.path.exists(directory) and not os.path.isdir(directory):
+            raise ValueError(f"'{name}' clashes with a file in {self.root}, please pick another player name")
+        return name
+
+    def get(self, player):
+        """The loaded engine for a player, creating the profile if it is new"""
+        engine = self.engines.get(player)
+        if engine is not None:
+            self.engines.move_to_end(player)
+            return engine
+
+        directory = self.directory(player)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        engine = GameEngine(open_backend(self.config, directory), on_error=self.on_error,
+                            profile=self.config.get('hint_profile')).load()
+        engine.on_record = lambda record: self.record(player, engine, record)
+        self.engines[player] = engine
+        while len(self.engines) > self.capacity:
+            _, evicted = self.engines.popitem(last=False)
+            evicted.close()
+        return engine
+
+    def load_leaderboard(self):
+        """Read the leaderboard, recounting players whose shard changed since it was saved"""
+        players = self.players()
+        try:
+            if self.leaderboard.load():
+                leaderboard = self.leaderboard
+                for player in set(leaderboard.players) - set(players):
+                    leaderboard.remove_player(player)
+                # Games added by merge, tournaments or the CLI went straight to the shard
+                stale = [player for player in players if leaderboard.marks.get(player) != self.shard_mark(player)]
+                for player in stale:
+                    self.count_player(player)
+                if stale:
+                    self.save_leaderboard()
+                return leaderboard
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding leaderboard: {e}")
+        self.leaderboard = Leaderboard(self.leaderboard.path)
+        for player in players:
+            self.count_player(player)
+        self.save_leaderboard()
+        return self.leaderboard
+
+    def count_player(self, player):
+        """Replace a player's leaderboard entries with what their shard holds"""
+        engine = self.get(player)
+        self.leaderboard.set_player(player, engine.stats, engine.best_scores, engine.best_times)
+        self.touched.add(player)
+
+    def record(self, player, engine, record):
+        self.leaderboard.update(player, record, engine.stats)
+        self.touched.add(player)
+        self.save_leaderboard()
+
+    def reset_player(self, player):
+        """Sync the leaderboard after a player's records were cleared"""
+        self.count_player(player)
+        self.save_leaderboard()
+
+    def save_leaderboard(self):
+        """Queue a save; the snapshot is taken on the writer thread"""
+        leaderboard = self.leaderboard
+        touched = list(self.touched)
+        path = leaderboard.path
+
+        def write():
+            # Marks first: anything they cover is already in the tables snapshotted below
+            marks = {player: self.shard_mark(player) for player in touched}
+            with leaderboard.lock:
+                leaderboard.marks.update(marks)
+                data = leaderboard.to_json()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_json_atomic(path, data, separators=(",", ":"))
+        self.writer.submit(key='leaderboard', job=write)
+
+    def report_error(self, error):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"Error saving leaderboard: {error}")
+
+    def close(self):
+        for engine in self.engines.values():
+            engine.close()
+        self.engines.clear()
+        if self.touched:
+            # The shards are flushed now, so the saved marks match what is on disk
+            self.save_leaderboard()
+        self.writer.close()
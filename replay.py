@@ -0,0 +1,192 @@
+"""Headless replay of recorded games, for debugging and fairness audits.
+
+A seeded game record carries everything needed to play it again: the seed
+regenerates the secret and the stored guesses are fed back through a fresh
+GameSession, so any change to the rules (or a tampered record) shows up as a
+mismatch. Large histories are split into chunks - byte ranges of the
+JSON-Lines log or row-id ranges of the SQLite database - that worker
+processes read and check on their own, so only small reports cross the
+process boundary.
+"""
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from game_engine import GameSession, MODE_TIMED
+from scores import parse_range_key
+from storage import HistoryLog
+
+# Work per task: bytes of the log, or rows of the database
+CHUNK_BYTES = 8 << 20
+CHUNK_ROWS = 100000
+
+# Mismatches kept (per chunk and in the final report) as examples
+MAX_EXAMPLES = 20
+
+
+def _frozen_clock():
+    return 0
+
+
+def replay_game(record):
+    """Play a seeded record again; returns (session, [GuessResult]) or None if it has no seed"""
+    seed = record.get('seed')
+    if seed is None:
+        return None
+    low, high = parse_range_key(record['range'])
+    session = GameSession(low, high, record['max_attempts'], seed=seed, clock=_frozen_clock)
+    results = []
+    for guess in record.get('guesses', ()):
+        if not session.active:
+            break
+        results.append(session.guess(guess))
+    return session, results
+
+
+def check_record(record):
+    """None if the record replays to the same outcome, else why it doesn't ('unseeded' without a seed)"""
+    try:
+        replayed = replay_game(record)
+        if replayed is None:
+            return 'unseeded'
+        session, results = replayed
+    except (KeyError, TypeError, ValueError) as e:
+        return f"unreadable: {e}"
+
+    guesses = record.get('guesses', ())
+    if session.secret_number != record['secret_number']:
+        return f"secret {record['secret_number']} but seed gives {session.secret_number}"
+    if len(results) < len(guesses):
+        return f"game ended after {len(results)} of {len(guesses)} guesses"
+    for number, result in enumerate(results, 1):
+        if not result.counted:
+            return f"guess {number} ({guesses[number - 1]}) was {result.status}"
+    if record['attempts_used'] != len(guesses):
+        return f"attempts_used {record['attempts_used']} but {len(guesses)} guesses"
+    if session.won != bool(record['won']):
+        return f"recorded {'win' if record['won'] else 'loss'} but replay {'won' if session.won else 'did not win'}"
+    # Only a timed game may stop with attempts left: its clock ran out
+    if session.active and record.get('mode') != MODE_TIMED:
+        return "game still in progress after the last guess"
+    return None
+
+
+class ReplayReport:
+    """Totals over a set of replayed records plus a few example mismatches"""
+
+    def __init__(self):
+        self.checked = 0
+        self.unseeded = 0
+        self.mismatches = 0
+        self.examples = []
+
+    def add(self, location, record):
+        problem = check_record(record)
+        if problem == 'unseeded':
+            self.unseeded += 1
+            return
+        self.checked += 1
+        if problem is not None:
+            self.mismatches += 1
+            if len(self.examples) < MAX_EXAMPLES:
+                self.examples.append((location, problem))
+
+    def merge(self, other):
+        self.checked += other.checked
+        self.unseeded += other.unseeded
+        self.mismatches += other.mismatches
+        self.examples.extend(other.examples[:MAX_EXAMPLES - len(self.examples)])
+        return self
+
+    @property
+    def ok(self):
+        return self.mismatches == 0
+
+    def summary(self):
+        lines = [f"Replayed {self.checked:,} seeded games: {self.checked - self.mismatches:,} match, "
+                 f"{self.mismatches:,} mismatches ({self.unseeded:,} unseeded games skipped)"]
+        for location, problem in self.examples:
+            lines.append(f"  {location}: {problem}")
+        return "\n".join(lines)
+
+
+def log_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """[(start, stop)] byte ranges of a JSON-Lines log, each ending just after a newline"""
+    size = HistoryLog(path, legacy_path=None).size()
+    bounds = [0]
+    with open(path, "rb") as f:
+        while bounds[-1] + chunk_bytes < size:
+            f.seek(bounds[-1] + chunk_bytes)
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+
+def replay_log_chunk(path, start, stop):
+    """Replay the records whose lines end within (start, stop] of the log"""
+    report = ReplayReport()
+    for record, offset in HistoryLog(path, legacy_path=None).iter_complete(start):
+        if offset > stop:
+            break
+        report.add(f"byte {offset}", record)
+    return report
+
+
+def db_chunks(path, chunk_rows=CHUNK_ROWS):
+    """[(after_id, last_id)] row-id ranges of the SQLite games table"""
+    from backends import SqliteBackend
+    backend = SqliteBackend(path).connect()
+    try:
+        last_id = backend.last_id()
+    finally:
+        backend.close()
+    return [(start, min(start + chunk_rows, last_id)) for start in range(0, last_id, chunk_rows)]
+
+
+def replay_db_chunk(path, after_id, last_id):
+    """Replay the games with after_id < id <= last_id"""
+    from backends import SqliteBackend
+    backend = SqliteBackend(path).connect()
+    report = ReplayReport()
+    try:
+        for record, row_id in backend.iter_after(after_id):
+            if row_id > last_id:
+                break
+            report.add(f"game {row_id}", record)
+    finally:
+        backend.close()
+    return report
+
+
+def replay_history(source, source_kind='jsonl', workers=None):
+    """Check every seeded game of a log or database; workers=1 replays in this process"""
+    if source_kind == 'sqlite':
+        tasks, replay_chunk = db_chunks(source), replay_db_chunk
+    else:
+        tasks, replay_chunk = log_chunks(source), replay_log_chunk
+    workers = workers or os.cpu_count() or 1
+
+    report = ReplayReport()
+    if workers == 1 or len(tasks) <= 1:
+        for start, stop in tasks:
+            report.merge(replay_chunk(source, start, stop))
+        return report
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        futures = [pool.submit(replay_chunk, source, start, stop) for start, stop in tasks]
+        for future in futures:
+            report.merge(future.result())
+    return report
+
+
+def run_replay(source, source_kind='jsonl', workers=None):
+    if source_kind == 'jsonl' and not os.path.exists(source):
+        print(f"No history found at {source}")
+        return None
+    try:
+        report = replay_history(source, source_kind, workers)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error replaying history: {e}")
+        return None
+    print(report.summary())
+    return report
@@ -0,0 +1,126 @@
+import bisect
+import json
+import os
+import re
+import threading
+
+from difficulty import DIFFICULTY_BUCKETS
+from storage import write_json_atomic
+
+SCORES_FORMAT_VERSION = 2
+
+_LEGACY_RANGE = re.compile(r'^(-?\d+)-(-?\d+)$')
+_LEGACY_ATTEMPTS = re.compile(r'^(\d+)_attempts$')
+
+
+def parse_range_key(range_key):
+    """'1-100' -> (1, 100); also handles negative bounds such as '-5--1'"""
+    match = _LEGACY_RANGE.match(range_key)
+    if not match:
+        raise ValueError(f"Bad range key: {range_key!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def format_range(number_range):
+    return f"{number_range[0]}-{number_range[1]}"
+
+
+class BestScoreIndex:
+    """Best winning attempts keyed by (min, max, max_attempts).
+
+    Distinct ranges are kept sorted by (min, max) for display and by size for
+    difficulty-bucket queries, both maintained with bisect as records arrive.
+    On disk it is a flat list of [min, max, max_attempts, best] rows; the old
+    nested {"1-100": {"10_attempts": 3}} JSON is still read transparently.
+    """
+
+    def __init__(self):
+        self.scores = {}
+        # Guards `scores` against to_json() running on the write-behind thread
+        self._lock = threading.Lock()
+        self.by_range = {}
+        self.ranges = []
+        self.by_size = []
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __bool__(self):
+        return bool(self.scores)
+
+    def __contains__(self, number_range):
+        return number_range in self.by_range
+
+    def get(self, min_range, max_range, max_attempts):
+        return self.scores.get((min_range, max_range, max_attempts))
+
+    def record(self, min_range, max_range, max_attempts, attempts):
+        """Record a win; returns True when it sets a new best"""
+        key = (min_range, max_range, max_attempts)
+        best = self.scores.get(key)
+        if best is not None and attempts >= best:
+            return False
+        with self._lock:
+            self.scores[key] = attempts
+
+        number_range = (min_range, max_range)
+        entries = self.by_range.get(number_range)
+        if entries is None:
+            entries = self.by_range[number_range] = {}
+            bisect.insort(self.ranges, number_range)
+            bisect.insort(self.by_size, (max_range - min_range + 1, min_range, max_range))
+        entries[max_attempts] = attempts
+        return True
+
+    def entries(self, number_range):
+        """[(max_attempts, best), ...] for one range, fewest max attempts first"""
+        return sorted(self.by_range.get(number_range, {}).items())
+
+    def ranges_in_bucket(self, name, buckets=DIFFICULTY_BUCKETS):
+        """Ranges whose size falls in the named difficulty bucket, sorted by range"""
+        lower = 0
+        for limit, bucket, _ in buckets:
+            if bucket == name:
+                start = bisect.bisect_right(self.by_size, (lower, float('inf')))
+                end = (len(self.by_size) if limit is None
+                       else bisect.bisect_right(self.by_size, (limit, float('inf'))))
+                return sorted((low, high) for _, low, high in self.by_size[start:end])
+            lower = limit
+        raise KeyError(name)
+
+    def clear(self):
+        self.__init__()
+
+    def to_json(self):
+        with self._lock:
+            scores = self.scores.copy()
+        rows = [[low, high, max_attempts, best]
+                for (low, high, max_attempts), best in scores.items()]
+        return {'version': SCORES_FORMAT_VERSION, 'scores': rows}
+
+    def save(self, path):
+        write_json_atomic(path, self.to_json(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data):
+        """Build an index from either the compact or the legacy nested format"""
+        index = cls()
+        if isinstance(data, dict) and data.get('version') == SCORES_FORMAT_VERSION:
+            for low, high, max_attempts, best in data['scores']:
+                index.record(low, high, max_attempts, best)
+            return index
+
+        for range_key, attempts_dict in data.items():
+            low, high = parse_range_key(range_key)
+            for attempts_key, best in attempts_dict.items():
+                match = _LEGACY_ATTEMPTS.match(attempts_key)
+                if match:
+                    index.record(low, high, int(match.group(1)), best)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
@@ -0,0 +1,233 @@
+"""Batch simulation of solver strategies against the game's hint feedback.
+
+Each strategy keeps the interval the secret can still be in and picks its
+next guess from it. The reference path plays real GameSession objects; when
+NumPy is installed, whole batches of games are advanced one attempt at a time
+with array operations instead, which is what makes 10^7 games practical.
+"""
+import json
+import random
+
+from difficulty import TIER_CLOSE, TIER_NEAR, get_profile
+from game_engine import GameSession, parse_settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Vectorized batches use int64 arrays; (low + high) must not overflow
+VECTOR_LIMIT = 2 ** 62
+
+
+class BinarySearch:
+    """Guess the middle of the feasible interval [low, high]"""
+
+    name = 'binary'
+    uses_tiers = False
+
+    def guess(self, low, high, rng):
+        return (low + high) // 2
+
+    def guess_batch(self, low, high, rng):
+        return (low + high) // 2
+
+
+class RandomGuess:
+    """Guess anywhere in the feasible interval [low, high]"""
+
+    name = 'random'
+    uses_tiers = False
+
+    def guess(self, low, high, rng):
+        return rng.randint(low, high)
+
+    def guess_batch(self, low, high, rng):
+        return rng.integers(low, high + 1)
+
+
+class TierAware(BinarySearch):
+    """Binary search that also narrows the interval with the far / near / close hint tiers"""
+
+    name = 'tiers'
+    uses_tiers = True
+
+
+# Strategies by name: each has guess() for one game and guess_batch() for NumPy arrays
+STRATEGIES = {strategy.name: strategy for strategy in (BinarySearch, RandomGuess, TierAware)}
+
+
+def narrow(strategy, low, high, guess, status, tier, limits):
+    """Feasible interval after a 'low' or 'high' answer, given the session's (near, far) hint limits"""
+    near, far = limits
+    if status == 'low':
+        low = guess + 1
+        if strategy.uses_tiers:
+            if tier == TIER_CLOSE:
+                high = min(high, guess + near)
+            elif tier == TIER_NEAR:
+                low, high = guess + near + 1, min(high, guess + far)
+            else:
+                low = guess + far + 1
+    else:
+        high = guess - 1
+        if strategy.uses_tiers:
+            if tier == TIER_CLOSE:
+                low = max(low, guess - near)
+            elif tier == TIER_NEAR:
+                low, high = max(low, guess - far), guess - near - 1
+            else:
+                high = guess - far - 1
+    return low, high
+
+
+class SimulationResult:
+    """Win counts and the attempts distribution for one strategy and setting"""
+
+    def __init__(self, strategy, min_range, max_range, max_attempts):
+        self.strategy = strategy
+        self.min_range = min_range
+        self.max_range = max_range
+        self.max_attempts = max_attempts
+        self.games = 0
+        # wins_by_attempts[n] = games won on attempt n
+        self.wins_by_attempts = [0] * (max_attempts + 1)
+
+    @property
+    def wins(self):
+        return sum(self.wins_by_attempts)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games * 100 if self.games else 0
+
+    @property
+    def avg_attempts(self):
+        wins = self.wins
+        return sum(n * count for n, count in enumerate(self.wins_by_attempts)) / wins if wins else 0
+
+    def percentile(self, fraction):
+        """Attempts needed by the given fraction of winning games"""
+        target = self.wins * fraction
+        seen = 0
+        for attempts, count in enumerate(self.wins_by_attempts):
+            seen += count
+            if count and seen >= target:
+                return attempts
+        return None
+
+    def to_dict(self):
+        return {
+            'strategy': self.strategy,
+            'range': f"{self.min_range}-{self.max_range}",
+            'max_attempts': self.max_attempts,
+            'games': self.games,
+            'win_rate': self.win_rate,
+            'avg_attempts': self.avg_attempts,
+            'wins_by_attempts': self.wins_by_attempts[1:],
+        }
+
+
+def simulate_reference(strategy, min_range, max_range, max_attempts, games, seed=None, profile=None):
+    """Play real GameSession objects one guess at a time"""
+    rng = random.Random(seed)
+    profile = get_profile(profile)
+    result = SimulationResult(strategy.name, min_range, max_range, max_attempts)
+    for _ in range(games):
+        session = GameSession(min_range, max_range, max_attempts, rng=rng, profile=profile)
+        low, high = min_range, max_range
+        while session.active:
+            guess = strategy.guess(low, high, rng)
+            outcome = session.guess(guess)
+            if outcome.status in ('low', 'high'):
+                low, high = narrow(strategy, low, high, guess, outcome.status, outcome.tier,
+                                   session.hint_limits)
+        if session.won:
+            result.wins_by_attempts[session.current_attempts] += 1
+    result.games = games
+    return result
+
+
+def simulate_vectorized(strategy, min_range, max_range, max_attempts, games, seed=None,
+                        chunk_size=1 << 20, profile=None):
+    """Advance a whole chunk of games per attempt with NumPy arrays"""
+    rng = np.random.default_rng(seed)
+    result = SimulationResult(strategy.name, min_range, max_range, max_attempts)
+    wins_by_attempts = np.zeros(max_attempts + 1, dtype=np.int64)
+    near_limit, far_limit = get_profile(profile).table(max_range - min_range + 1).limits
+
+    for start in range(0, games, chunk_size):
+        n = min(chunk_size, games - start)
+        secret = rng.integers(min_range, max_range + 1, n)
+        low = np.full(n, min_range, dtype=np.int64)
+        high = np.full(n, max_range, dtype=np.int64)
+
+        for attempt in range(1, max_attempts + 1):
+            guess = strategy.guess_batch(low, high, rng)
+            hit = guess == secret
+            wins_by_attempts[attempt] += np.count_nonzero(hit)
+
+            # Only games still in progress carry on to the next attempt
+            miss = ~hit
+            secret, low, high, guess = secret[miss], low[miss], high[miss], guess[miss]
+            if not secret.size:
+                break
+
+            too_low = guess < secret
+            low = np.where(too_low, guess + 1, low)
+            high = np.where(too_low, high, guess - 1)
+            if strategy.uses_tiers:
+                diff = np.abs(secret - guess)
+                close = diff <= near_limit
+                near = ~close & (diff <= far_limit)
+                far = diff > far_limit
+                low = np.where(too_low & near, guess + near_limit + 1, low)
+                low = np.where(too_low & far, guess + far_limit + 1, low)
+                high = np.where(too_low & close, np.minimum(high, guess + near_limit), high)
+                high = np.where(too_low & near, np.minimum(high, guess + far_limit), high)
+                high = np.where(~too_low & near, guess - near_limit - 1, high)
+                high = np.where(~too_low & far, guess - far_limit - 1, high)
+                low = np.where(~too_low & close, np.maximum(low, guess - near_limit), low)
+                low = np.where(~too_low & near, np.maximum(low, guess - far_limit), low)
+
+    result.games = games
+    result.wins_by_attempts = [int(count) for count in wins_by_attempts]
+    return result
+
+
+def simulate(strategy_name, min_range, max_range, max_attempts, games, seed=None, vectorized=True,
+             profile=None):
+    strategy = STRATEGIES[strategy_name]()
+    if vectorized and np is not None and -VECTOR_LIMIT <= min_range and max_range < VECTOR_LIMIT:
+        return simulate_vectorized(strategy, min_range, max_range, max_attempts, games, seed,
+                                   profile=profile)
+    return simulate_reference(strategy, min_range, max_range, max_attempts, games, seed, profile)
+
+
+def parse_config(text):
+    """Parse 'min:max:attempts' (e.g. '1:1e18:60' or '1:1e18:auto') into a tuple of ints"""
+    return parse_settings(*text.split(':'))
+
+
+def run_simulations(configs, strategy_names, games, seed=None, vectorized=True, json_path=None,
+                    profile=None):
+    """Simulate every strategy on every setting and print a report"""
+    if vectorized and np is None:
+        print("NumPy not installed - using the (much slower) reference simulator")
+
+    results = []
+    for min_range, max_range, max_attempts in configs:
+        print(f"\nRange {min_range} - {max_range} ({max_range - min_range + 1} numbers), "
+              f"{max_attempts} max attempts, {games:,} games")
+        print(f"  {'strategy':<8} {'win rate':>9} {'avg':>6} {'p50':>4} {'p90':>4}  wins by attempt")
+        for name in strategy_names:
+            result = simulate(name, min_range, max_range, max_attempts, games, seed, vectorized, profile)
+            results.append(result)
+            distribution = ' '.join(str(count) for count in result.wins_by_attempts[1:])
+            print(f"  {name:<8} {result.win_rate:>8.2f}% {result.avg_attempts:>6.2f} "
+                  f"{result.percentile(0.5) or '-':>4} {result.percentile(0.9) or '-':>4}  {distribution}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump([result.to_dict() for result in results], f, indent=2)
+    return results
@@ -0,0 +1,221 @@
+import json
+import os
+import time
+from datetime import date
+
+from storage import write_json_atomic
+
+# Days of per-day totals kept for "today" and "last N days" queries
+DAY_BUCKETS = 366
+
+
+class DayBuckets:
+    """Games and wins per calendar day over the most recent DAY_BUCKETS days.
+
+    A fixed ring of slots indexed by day number, so adding a game is O(1) and
+    a window of N days costs N slot reads no matter how long the history is.
+    Games older than the ring are only in the all-time counters.
+    """
+
+    def __init__(self, size=DAY_BUCKETS):
+        self.size = size
+        self.days = [-1] * size
+        self.games = [0] * size
+        self.wins = [0] * size
+        self.latest = -1
+        # Records arrive in date order, so consecutive ones usually share a day
+        self._last_date = None
+        self._last_day = -1
+
+    def day_number(self, timestamp):
+        """Day ordinal of a 'YYYY-MM-DD ...' date (raises ValueError)"""
+        prefix = timestamp[:10]
+        if prefix != self._last_date:
+            self._last_day = date.fromisoformat(prefix).toordinal()
+            self._last_date = prefix
+        return self._last_day
+
+    def add(self, day, games, wins):
+        if day <= self.latest - self.size:
+            return
+        slot = day % self.size
+        if self.days[slot] != day:
+            # The slot last held the day `size` days earlier
+            self.days[slot] = day
+            self.games[slot] = 0
+            self.wins[slot] = 0
+        self.games[slot] += games
+        self.wins[slot] += wins
+        if day > self.latest:
+            self.latest = day
+
+    def window(self, days, today=None):
+        """(games, wins) over the `days` days ending with today"""
+        if today is None:
+            today = date.today().toordinal()
+        games = wins = 0
+        for day in range(today - min(days, self.size) + 1, today + 1):
+            slot = day % self.size
+            if self.days[slot] == day:
+                games += self.games[slot]
+                wins += self.wins[slot]
+        return games, wins
+
+    def to_json(self):
+        return [[self.days[slot], self.games[slot], self.wins[slot]]
+                for slot in range(self.size) if self.days[slot] >= 0]
+
+    @classmethod
+    def from_json(cls, rows):
+        buckets = cls()
+        for day, games, wins in sorted(rows):
+            buckets.add(day, games, wins)
+        return buckets
+
+
+class StatsAggregator:
+    """Running totals for the statistics card.
+
+    Each finished game updates the counters in O(1), so refreshing the stats
+    never walks the history. The snapshot is saved next to the history log
+    together with the log offset it covers; on load only the records appended
+    after that offset are replayed, and a full rebuild happens only when the
+    snapshot is missing, corrupt or ahead of the log.
+    """
+
+    FIELDS = ('total', 'wins', 'win_attempts_sum', 'best_attempts',
+              'current_streak', 'longest_streak', 'log_offset')
+
+    # Snapshots without per-day totals predate them and are rebuilt once
+    DAYS_FIELD = 'days'
+
+    def __init__(self, path="game_stats.json", save_interval=0.0):
+        self.path = path
+        self.save_interval = save_interval
+        self._last_save = 0.0
+        # Damaged log lines skipped by the last catch-up
+        self.damaged = 0
+        self.reset()
+
+    def reset(self):
+        self.total = 0
+        self.wins = 0
+        self.win_attempts_sum = 0
+        self.best_attempts = None
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.log_offset = 0
+        self.days = DayBuckets()
+
+    def add(self, record):
+        """Fold one finished game into the counters"""
+        self.total += 1
+        if record['won']:
+            attempts = record['attempts_used']
+            self.wins += 1
+            self.win_attempts_sum += attempts
+            if self.best_attempts is None or attempts < self.best_attempts:
+                self.best_attempts = attempts
+            self.current_streak += 1
+            if self.current_streak > self.longest_streak:
+                self.longest_streak = self.current_streak
+        else:
+            self.current_streak = 0
+        try:
+            self.days.add(self.days.day_number(record['date']), 1, 1 if record['won'] else 0)
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def rebuild(self, records):
+        """Recount from an iterable of records (streamed, never held in memory)"""
+        self.reset()
+        for record in records:
+            if record is not None:
+                self.add(record)
+        return self
+
+    @property
+    def win_rate(self):
+        return (self.wins / self.total * 100) if self.total > 0 else 0
+
+    @property
+    def avg_attempts(self):
+        return self.win_attempts_sum / self.wins if self.wins else 0
+
+    @property
+    def games_today(self):
+        return self.days.window(1)[0]
+
+    def recent_win_rate(self, days=7):
+        """Win rate over the last `days` days, or None without games in them"""
+        games, wins = self.days.window(days)
+        return wins / games * 100 if games else None
+
+    def to_dict(self):
+        snapshot = {field: getattr(self, field) for field in self.FIELDS}
+        snapshot[self.DAYS_FIELD] = self.days.to_json()
+        return snapshot
+
+    def restore(self, snapshot):
+        """Take the counters from a to_dict() snapshot (KeyError if it is incomplete)"""
+        for field in self.FIELDS:
+            setattr(self, field, snapshot[field])
+        self.days = DayBuckets.from_json(snapshot[self.DAYS_FIELD])
+
+    def save(self):
+        self.save_snapshot(self.to_dict(), force=True)
+
+    def save_snapshot(self, snapshot, force=False):
+        """Persist a snapshot (a cache, so no fsync - it can always be rebuilt).
+
+        Unless forced, skips the write when the last one is younger than
+        save_interval seconds; load() replays the log past the saved offset.
+        """
+        if not force and time.monotonic() - self._last_save < self.save_interval:
+            return
+        self._last_save = time.monotonic()
+        try:
+            write_json_atomic(self.path, snapshot, fsync=False)
+        except Exception as e:
+            print(f"Error saving stats: {e}")
+
+    def load(self, history_log):
+        """Restore the snapshot and catch up with the history log"""
+        self.reset()
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.restore(json.load(f))
+        except Exception as e:
+            print(f"Rebuilding stats, snapshot unreadable: {e}")
+            self.reset()
+        self.damaged = 0
+        log_size = history_log.size()
+        if self.log_offset > log_size or history_log.rewritten:
+            # The log was rewritten or replaced underneath the snapshot, so offsets no longer line up
+            self.reset()
+        if self.log_offset < log_size:
+            self.catch_up(history_log, log_size)
+        return self
+
+    def summary(self):
+        best = self.best_attempts if self.best_attempts is not None else "N/A"
+        recent = self.recent_win_rate()
+        return (f"🎮 Games Played: {self.total}\n"
+                f"🏆 Games Won: {self.wins}\n"
+                f"💯 Win Rate: {self.win_rate:.1f}%\n"
+                f"⚡ Best Score: {best}\n"
+                f"📈 Avg Attempts: {self.avg_attempts:.1f}\n"
+                f"🔥 Current Streak: {self.current_streak}\n"
+                f"🏅 Longest Streak: {self.longest_streak}\n"
+                f"📅 Games Today: {self.games_today}\n"
+                f"📆 7-Day Win Rate: {'N/A' if recent is None else f'{recent:.1f}%'}")
+
+    def catch_up(self, history_log, log_size):
+        for record in history_log.iter_records(self.log_offset):
+            if record is not None:
+                self.add(record)
+            else:
+                self.damaged += 1
+        self.log_offset = log_size
+        self.save()
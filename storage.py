@@ -0,0 +1,435 @@
+import codecs
+import json
+import mmap
+import os
+import re
+import threading
+import time
+
+import metrics
+
+SAVE_BYTES = metrics.counter('save_bytes_total', "Bytes written to history and snapshot files")
+
+
+class HistoryLog:
+    """Append-only JSON-Lines store for finished games.
+
+    Every game is written as one line, so saving a result costs the same no
+    matter how long the history is. Lines are flushed immediately and fsynced
+    in batches; damaged lines left behind by a crash are dropped by compaction.
+    """
+
+    def __init__(self, path="game_history.jsonl", legacy_path="game_history.json",
+                 sync_every=20, sync_interval=2.0, compact_threshold=100):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # Set once compaction has rewritten the file, which moves every byte offset
+        self.rewritten = False
+
+    def repair(self, force=False):
+        """Migrate the legacy file and drop damaged lines; returns how many were dropped.
+
+        The log is only rewritten when a crash left a torn final line, or with force.
+        """
+        self.migrate_legacy()
+        if not force and self._ends_with_newline():
+            return 0
+        damaged = [0]
+
+        def intact():
+            for record in self.iter_records():
+                if record is None:
+                    damaged[0] += 1
+                else:
+                    yield record
+        # A torn final line would swallow the next append, so rewrite cleanly
+        self.compact(intact())
+        if damaged[0]:
+            print(f"Skipped {damaged[0]} damaged history lines in {self.path}")
+        return damaged[0]
+
+    def tail(self, count, chunk_size=1 << 16):
+        """The last `count` intact records, oldest first, read backwards from the end"""
+        if count <= 0 or not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            data = b""
+            while position > 0 and data.count(b"\n") <= count:
+                step = min(chunk_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.split(b"\n")
+        if position > 0:
+            # The first line was cut by the chunk boundary
+            lines = lines[1:]
+        records = []
+        for line in reversed(lines):
+            if len(records) == count:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        records.reverse()
+        return records
+
+    def iter_records(self, offset=0):
+        """Yield records from a byte offset onwards (None for a damaged line)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+    def iter_complete(self, offset=0):
+        """Yield (record, offset past its line) for whole lines from a byte offset.
+
+        A final line without its newline may still be being written, so it is
+        left for the next call; damaged lines are skipped.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line), offset
+                except ValueError:
+                    continue
+
+    def size(self):
+        """Current length of the log in bytes"""
+        if self._file is not None:
+            return self._file.tell()
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, record):
+        """Append one record and fsync once the current batch is full.
+
+        Returns the byte offset just past the new record.
+        """
+        f = self._open()
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        f.write(line)
+        f.flush()
+        SAVE_BYTES.inc(len(line))  # json.dumps escapes to ASCII, so chars == bytes
+        self._unsynced += 1
+        if (self._unsynced >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+        return f.tell()
+
+    def append_many(self, records):
+        """Append a batch of records with one write and one fsync"""
+        return self.append_lines(json.dumps(record, separators=(",", ":")) for record in records)
+
+    def append_lines(self, lines):
+        """append_many() for records that are already serialized, one JSON object per line"""
+        f = self._open()
+        data = "".join(line + "\n" for line in lines)
+        f.write(data)
+        f.flush()
+        SAVE_BYTES.inc(len(data))
+        self._unsynced += 1
+        self.sync()
+        return f.tell()
+
+    def sync(self):
+        """Force pending appends to disk"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self, records):
+        """Atomically rewrite the log so it holds exactly the given records"""
+        self.close()
+        write_lines_atomic(self.path, records)
+        self.rewritten = True
+
+    def clear(self):
+        """Drop every record from the log"""
+        self.compact([])
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def migrate_legacy(self):
+        """One-time conversion of game_history.json into the append-only log"""
+        if os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        # Stream records straight into the log; a damaged file keeps every complete record
+        reader = JsonArrayReader(self.legacy_path)
+        try:
+            write_lines_atomic(self.path, reader)
+        except Exception as e:
+            print(f"Error migrating game history: {e}")
+            return
+        if reader.damaged:
+            print(f"Recovered {reader.records} records from {self.legacy_path}, "
+                  f"{reader.damaged} damaged entries skipped")
+        os.replace(self.legacy_path, self.legacy_path + ".migrated")
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def ensure_newline(self):
+        """End a torn final line, so the next append starts a line of its own"""
+        # Once the file is open for appending, every line in it was written whole
+        if self._file is None and not self._ends_with_newline():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    def _ends_with_newline(self):
+        if not os.path.exists(self.path):
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+
+# Boundary between two array elements: the end of one object and the start of the next
+_NEXT_RECORD = re.compile(r'\}\s*,\s*\{')
+
+
+class JsonArrayReader:
+    """Stream the objects of a top-level JSON array without loading it whole.
+
+    The file is decoded chunk by chunk (optionally through mmap) and each
+    element is handed out as soon as it is complete, so memory stays at about
+    one chunk however large the file is. Unlike json.load, a truncated or
+    partly corrupt file still yields every complete record; `damaged` counts
+    what had to be skipped.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20, use_mmap=False, max_record_size=1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.max_record_size = max_record_size
+        self.records = 0
+        self.damaged = 0
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        chunks = self._chunks()
+        buffer = ""
+        pos = 0
+        in_array = False
+
+        while True:
+            # Skip whitespace and separators
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                buffer, pos = chunk, 0
+                continue
+
+            if not in_array:
+                if buffer[pos] != '[':
+                    raise ValueError(f"{self.path} does not contain a JSON array")
+                in_array = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = None
+                if len(buffer) - pos < self.max_record_size:
+                    chunk = next(chunks, None)
+                if chunk is not None:
+                    # Probably just cut off at the chunk boundary - read more
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+                # Corrupt or truncated element: resume at the next top-level object
+                self.damaged += 1
+                match = _NEXT_RECORD.search(buffer, pos)
+                if match is None:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        return
+                    # Keep a little tail in case the separator straddles chunks
+                    buffer, pos = buffer[-16:] + chunk, 0
+                else:
+                    pos = match.end() - 1
+                continue
+
+            pos = end
+            if isinstance(record, dict):
+                self.records += 1
+                yield record
+            else:
+                self.damaged += 1
+
+    def _chunks(self):
+        """Decoded text chunks of the file"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(self.path, "rb") as f:
+            if self.use_mmap and os.path.getsize(self.path) > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for start in range(0, len(mapped), self.chunk_size):
+                        yield decoder.decode(mapped[start:start + self.chunk_size])
+            else:
+                while True:
+                    data = f.read(self.chunk_size)
+                    if not data:
+                        break
+                    yield decoder.decode(data)
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+class WriteBehindWorker:
+    """Background thread that performs disk writes off the caller's thread.
+
+    Callers hand over zero-argument jobs that already hold the data to write.
+    `ordered` jobs (log appends, row inserts) all run, in submission order;
+    keyed jobs (whole-file snapshots) coalesce so only the latest per key runs.
+    The worker waits `delay` seconds after being woken so bursts of saves
+    collapse into one write. Failures go to on_error, called on the worker
+    thread.
+    """
+
+    def __init__(self, delay=0.25, on_error=None, name="write-behind"):
+        self.delay = delay
+        self.on_error = on_error
+        self.name = name
+        self._lock = threading.Lock()
+        self._ordered = []
+        self._keyed = {}
+        self._wakeup = threading.Event()
+        self._hurry = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._closing = False
+        self._thread = None
+
+    def submit(self, ordered=None, key=None, job=None):
+        """Queue an ordered job and/or a keyed job in one step"""
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("write-behind worker is closed")
+            if ordered is not None:
+                self._ordered.append(ordered)
+            if key is not None:
+                # Re-inserting moves the key last, so snapshots run in submission order
+                self._keyed.pop(key, None)
+                self._keyed[key] = job
+            self._idle.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self, timeout=None):
+        """Wake the worker and wait until everything queued so far is written"""
+        self._hurry.set()
+        self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def close(self):
+        """Write whatever is still queued and stop the thread"""
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+        self._hurry.set()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self._drain()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Debounce: let a burst of saves pile up and coalesce (unless flushing)
+            self._hurry.wait(self.delay)
+            self._wakeup.clear()
+            self._hurry.clear()
+            with metrics.timer('write_behind_drain', "Time the background writer spends per batch"):
+                self._drain()
+            with self._lock:
+                if self._ordered or self._keyed:
+                    continue
+                self._idle.set()
+                if self._closing:
+                    return
+
+    def _drain(self):
+        with self._lock:
+            jobs = self._ordered + list(self._keyed.values())
+            self._ordered = []
+            self._keyed = {}
+        for job in jobs:
+            try:
+                job()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+                else:
+                    print(f"Error writing data: {e}")
+
+
+def write_lines_atomic(path, records):
+    """Write records as JSON lines through a temp file and os.replace"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+        SAVE_BYTES.inc(f.tell())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, fsync=True, **kwargs):
+    """Write a JSON document through a temp file and os.replace"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **kwargs)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        SAVE_BYTES.inc(f.tell())
+    os.replace(tmp_path, path)
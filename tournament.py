@@ -0,0 +1,194 @@
+"""Bot tournaments: solver strategies playing real GameSessions across a process pool.
+
+Matches are cut into chunks (one strategy, one setting, a run of match
+numbers) that worker processes play without sharing anything. Every match
+has a seed derived from the tournament seed, the setting and the match
+number, so all strategies face the same secrets and any match can be replayed
+from its record. Workers only send back their tallies and records; the parent
+merges them and stores every game with one bulk write at the end instead of
+one save per game.
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from difficulty import get_profile
+from game_engine import GameEngine, GameSession, SEED_BITS
+from simulator import STRATEGIES, narrow
+
+# Matches per work unit: big enough to amortise pickling, small enough to balance
+CHUNK_MATCHES = 2000
+
+TOURNAMENT_DIR = "tournament"
+
+SEED_MASK = (1 << SEED_BITS) - 1
+
+
+def match_seed(tournament_seed, config_index, match):
+    """Seed of one match; the same for every strategy on that setting"""
+    return (tournament_seed * 1_000_003 + config_index * 10_000_019 + match) & SEED_MASK
+
+
+class ChunkResult:
+    """Tallies (and optionally the records) of one work unit"""
+
+    def __init__(self, strategy, config, max_attempts):
+        self.strategy = strategy
+        self.config = config
+        self.games = 0
+        self.guesses = 0
+        # wins_by_attempts[n] = games won on attempt n
+        self.wins_by_attempts = [0] * (max_attempts + 1)
+        self.records = []
+
+
+def play_chunk(strategy_name, config_index, config, tournament_seed, first_match, count, keep_records=True,
+               profile=None):
+    """Worker: play `count` matches of one strategy on one setting"""
+    min_range, max_range, max_attempts = config
+    strategy = STRATEGIES[strategy_name]()
+    # Workers build their own hint tables from the profile's name or settings
+    profile = get_profile(profile)
+    rng = random.Random(f"{tournament_seed}:{strategy_name}:{config_index}:{first_match}")
+    result = ChunkResult(strategy_name, config, max_attempts)
+    for match in range(first_match, first_match + count):
+        session = GameSession(min_range, max_range, max_attempts,
+                              seed=match_seed(tournament_seed, config_index, match), profile=profile)
+        low, high = min_range, max_range
+        while session.active:
+            guess = strategy.guess(low, high, rng)
+            outcome = session.guess(guess)
+            if outcome.status in ('low', 'high'):
+                low, high = narrow(strategy, low, high, guess, outcome.status, outcome.tier,
+                                   session.hint_limits)
+        result.games += 1
+        result.guesses += session.current_attempts
+        if session.won:
+            result.wins_by_attempts[session.current_attempts] += 1
+        if keep_records:
+            record = session.to_record()
+            record['bot'] = strategy_name
+            result.records.append(record)
+    return result
+
+
+class Standing:
+    """Merged results of one strategy on one setting"""
+
+    def __init__(self, strategy, config):
+        self.strategy = strategy
+        self.config = config
+        self.games = 0
+        self.guesses = 0
+        self.wins_by_attempts = [0] * (config[2] + 1)
+
+    def merge(self, chunk):
+        self.games += chunk.games
+        self.guesses += chunk.guesses
+        for attempts, wins in enumerate(chunk.wins_by_attempts):
+            self.wins_by_attempts[attempts] += wins
+
+    @property
+    def wins(self):
+        return sum(self.wins_by_attempts)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games * 100 if self.games else 0
+
+    @property
+    def avg_attempts(self):
+        wins = self.wins
+        return sum(n * count for n, count in enumerate(self.wins_by_attempts)) / wins if wins else 0
+
+
+class Tournament:
+    """Every strategy plays `matches` games on every setting"""
+
+    def __init__(self, strategies, configs, matches, seed=None, chunk_matches=CHUNK_MATCHES, profile=None):
+        self.strategies = list(strategies)
+        self.configs = list(configs)
+        self.matches = matches
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.chunk_matches = chunk_matches
+        self.profile = profile
+        self.standings = {(name, config): Standing(name, config)
+                          for config in self.configs for name in self.strategies}
+        self.records = []
+        self.elapsed = 0.0
+
+    def tasks(self, keep_records):
+        for config_index, config in enumerate(self.configs):
+            for name in self.strategies:
+                for first in range(0, self.matches, self.chunk_matches):
+                    yield (name, config_index, config, self.seed, first,
+                           min(self.chunk_matches, self.matches - first), keep_records, self.profile)
+
+    def run(self, workers=None, keep_records=True):
+        """Play every match; workers=1 plays in this process"""
+        workers = workers or os.cpu_count() or 1
+        started = time.perf_counter()
+        if workers == 1:
+            for task in self.tasks(keep_records):
+                self.merge(play_chunk(*task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(play_chunk, *task) for task in self.tasks(keep_records)]
+                for future in as_completed(futures):
+                    self.merge(future.result())
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    def merge(self, chunk):
+        self.standings[(chunk.strategy, chunk.config)].merge(chunk)
+        self.records.extend(chunk.records)
+
+    @property
+    def games(self):
+        return sum(standing.games for standing in self.standings.values())
+
+    def save(self, engine):
+        """Store every game and the best scores with one bulk write"""
+        engine.record_many(self.records)
+
+    def ranking(self):
+        """[(strategy, wins, games, avg attempts)] over all settings, most wins first"""
+        rows = []
+        for name in self.strategies:
+            standings = [self.standings[(name, config)] for config in self.configs]
+            wins = sum(standing.wins for standing in standings)
+            attempts = sum(standing.avg_attempts * standing.wins for standing in standings)
+            rows.append((name, wins, sum(standing.games for standing in standings),
+                         attempts / wins if wins else 0))
+        return sorted(rows, key=lambda row: (-row[1], row[3], row[0]))
+
+    def report(self):
+        lines = [f"Tournament seed {self.seed}: {self.games:,} matches in {self.elapsed:.2f}s "
+                 f"({self.games / self.elapsed if self.elapsed else 0:,.0f}/s)"]
+        for config in self.configs:
+            min_range, max_range, max_attempts = config
+            lines.append(f"\nRange {min_range} - {max_range}, {max_attempts} max attempts")
+            lines.append(f"  {'strategy':<8} {'win rate':>9} {'avg':>6}")
+            for name in self.strategies:
+                standing = self.standings[(name, config)]
+                lines.append(f"  {name:<8} {standing.win_rate:>8.2f}% {standing.avg_attempts:>6.2f}")
+        lines.append("\n🏆 STANDINGS")
+        for place, (name, wins, games, avg) in enumerate(self.ranking(), 1):
+            lines.append(f"  {place}. {name:<8} {wins:,} / {games:,} wins, {avg:.2f} attempts per win")
+        return "\n".join(lines)
+
+
+def run_tournament(strategies, configs, matches, seed=None, workers=None, backend=None,
+                   chunk_matches=CHUNK_MATCHES, profile=None):
+    """Play, print the standings and (with a backend) store the games"""
+    tournament = Tournament(strategies, configs, matches, seed, chunk_matches, profile)
+    tournament.run(workers, keep_records=backend is not None)
+    print(tournament.report())
+    if backend is not None:
+        engine = GameEngine(backend).load()
+        started = time.perf_counter()
+        tournament.save(engine)
+        engine.close()
+        print(f"\nSaved {len(tournament.records):,} games in {time.perf_counter() - started:.2f}s")
+    return tournament
@@ -0,0 +1,69 @@
+"""Batched widget updates for the Tk view.
+
+Handlers describe what a widget should show with configure()/set_value()
+instead of calling .config() themselves. Changes are collected until Tk is
+idle and then applied in one pass: each widget is configured once per cycle,
+with only the options that differ from what it already shows. A burst of
+guesses (holding Enter) therefore costs one layout pass, not one per guess,
+and repeating the same message doesn't touch the widget at all.
+"""
+
+_UNSET = object()
+
+
+class ViewModel:
+    """Pending widget state, flushed once per idle cycle.
+
+    `schedule` is root.after_idle; without one, changes are applied
+    immediately (still skipping unchanged options).
+    """
+
+    def __init__(self, schedule=None):
+        self.schedule = schedule
+        # key -> (apply, {option: value}), in first-change order
+        self.pending = {}
+        # key -> {option: value} as last applied
+        self.shown = {}
+        self._job = None
+        # Updates asked for, widget updates actually made, and flushes that made any
+        self.requested = 0
+        self.applied = 0
+        self.redraws = 0
+
+    def configure(self, widget, **options):
+        """Queue widget.config(**options)"""
+        self._queue(widget, widget.config, options)
+
+    def set_value(self, variable, value):
+        """Queue variable.set(value) for a Tk variable bound to a widget"""
+        # Tk variables compare by name and aren't hashable, so key them by their Tcl name
+        self._queue(str(variable), lambda value: variable.set(value), {'value': value})
+
+    def _queue(self, key, apply, options):
+        self.requested += 1
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = (apply, dict(options))
+        else:
+            entry[1].update(options)
+        if self.schedule is None:
+            self.flush()
+        elif self._job is None:
+            self._job = self.schedule(self.flush)
+
+    def flush(self):
+        """Apply every pending change that differs from what is shown"""
+        self._job = None
+        pending, self.pending = self.pending, {}
+        changed_any = False
+        for key, (apply, options) in pending.items():
+            shown = self.shown.setdefault(key, {})
+            changed = {option: value for option, value in options.items()
+                       if shown.get(option, _UNSET) != value}
+            if changed:
+                apply(**changed)
+                shown.update(changed)
+                self.applied += 1
+                changed_any = True
+        if changed_any:
+            self.redraws += 1